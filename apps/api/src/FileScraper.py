@@ -2,50 +2,111 @@ import sys, os
 sys.path.append(os.path.dirname(__file__))
 
 import os
+import re
+import multiprocessing
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 import lancedb
-import pandas as pd
+import numpy as np
 import pyarrow as pa
 
-#Text scraping/embedding imports 
-import docx
-import pdfplumber
-from bs4 import BeautifulSoup as soup
-from sentence_transformers import SentenceTransformer
-
-#Image embedding imports (match package path under clarity_api/indexing)
-from clarity_api.indexing.image_embed import ImageEmbedder
-from transformers import pipeline, BlipProcessor, BlipForConditionalGeneration
-from PIL import Image
-import torch 
-
-
-schema = pa.schema([
-    pa.field("Path", pa.string()),
-    pa.field("Parent", pa.string()),
-    pa.field("Vector", pa.list_(pa.float32())),  # embedding vector
-    pa.field("Name", pa.string()),
-    pa.field("When_Created", pa.float64()),  # UNIX timestamp
-    pa.field("When_Last_Modified", pa.float64()),
-    pa.field("Description", pa.string()),
-    pa.field("File_type", pa.string()),
-])    
+# Parsers and ML models are imported where they are used, so importing this module (scripts,
+# search, spawned scrape workers) doesn't pay for torch/transformers until something summarizes
+
+# Words per text chunk; chunks are re-split into SUMMARY_MAX_TOKENS windows before summarizing
+CHUNK_MAX_WORDS = 500
+# Token budget per summarizer input; distilbart reads 1024 tokens, the rest is headroom for
+# special tokens and re-tokenizing decoded windows
+SUMMARY_MAX_TOKENS = 900
+# Number of text chunks handed to the summarization pipeline per forward pass (CPU / CUDA)
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 8))
+SUMMARY_BATCH_SIZE_GPU = int(os.getenv("SUMMARY_BATCH_SIZE_GPU", 16))
+# Number of strings handed to the sentence embedder per encode call
+EMBED_BATCH_SIZE = 64
+# Pending text chunks (across files) that trigger a summarizer flush in local_scrape
+SUMMARY_FLUSH_CHUNKS = 32
+# Images captioned/embedded together per BLIP generate and CLIP forward pass in local_scrape
+IMAGE_BATCH_SIZE = 16
+# Threads decoding image batches ahead of the models, and how many decoded batches may queue up
+IMAGE_READ_WORKERS = 4
+IMAGE_PREFETCH_BATCHES = 2
+# Worker processes used for text extraction in local_scrape; one core is left for the
+# main process, which runs the models
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", max(1, (os.cpu_count() or 1) - 1)))
+# Page count at which scrape_pdf splits extraction across worker processes
+PDF_PARALLEL_MIN_PAGES = 32
+# Extensions routed to text_scrape / the image captioner; everything else is skipped before any I/O
+TEXT_EXTENSIONS = frozenset({'.docx', '.pdf', '.html', '.htm', '.txt', '.py', '.cpp', '.java', '.json', '.csv'})
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg'})
+FILE_KINDS = {**dict.fromkeys(TEXT_EXTENSIONS, "text"), **dict.fromkeys(IMAGE_EXTENSIONS, "image")}
+# Files larger than this (bytes) are skipped rather than scraped
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", 50 * 1024 * 1024))
+# Element type of vectors written by local_scrape; "float16" halves storage and scan bytes
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+# System directories local_scrape never descends into
+EXCLUDE_DIRS = frozenset({
+    '/System', '/Library', '/private', '/dev', '/Volumes', '/Applications', '/usr', '/bin', '/sbin', '/etc', '/proc', '/tmp',
+    'C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)', 'C:\\Users\\All Users', 'C:\\ProgramData'
+})
+# Rows buffered per LanceDB table before they are appended in one write
+INSERT_BATCH_SIZE = 512
+# IVF_PQ needs enough rows to train its partitions; smaller tables are scanned directly
+VECTOR_INDEX_MIN_ROWS = int(os.getenv("VECTOR_INDEX_MIN_ROWS", 5000))
+# Incremental inserts land unindexed; fold them in once this many have accumulated
+REINDEX_UNINDEXED_ROWS = int(os.getenv("REINDEX_UNINDEXED_ROWS", 1000))
+
+
+def make_schema(vector_dim=None, vector_type=None):
+    """Table schema; a known vector_dim stores Vector as a fixed-size list (no per-row offsets)."""
+    return pa.schema([
+        pa.field("Path", pa.string()),
+        pa.field("Parent", pa.string()),
+        pa.field("Vector", pa.list_(vector_type or pa.float32(), vector_dim or -1)),  # embedding vector
+        pa.field("Name", pa.string()),
+        pa.field("When_Created", pa.float64()),  # UNIX timestamp
+        pa.field("When_Last_Modified", pa.float64()),
+        pa.field("Description", pa.string()),
+        pa.field("File_type", pa.string()),
+        pa.field("Size", pa.int64()),  # bytes at index time, so the tree never stats files
+    ])
+
+
+schema = make_schema()    
 
 #File Scraper class
 class FileScraper:
     def __init__(self, file_path):
         self.file_path = file_path  
           
-    def chunk_text(self, text, max_words=500):
-        words = text.split()
-        chunks = []
-        for i in range(0, len(words), max_words):
-            chunk = ' '.join(words[i:i+max_words])
-            chunks.append(chunk)
-        return chunks
+    @staticmethod
+    def chunk_text(text, max_words=CHUNK_MAX_WORDS):
+        # Each match is a run of up to max_words words, sliced straight out of the source text
+        return _chunk_pattern(max_words).findall(text)
+
+    @staticmethod
+    def iter_chunks(text_iter, max_words=CHUNK_MAX_WORDS):
+        """Yield the same chunks as chunk_text('\n'.join(text_iter)) while holding one piece at a time."""
+        pattern = _chunk_pattern(max_words)
+        carry = None
+        for text in text_iter:
+            text = text if carry is None else f"{carry}\n{text}"
+            matches = list(pattern.finditer(text))
+            carry = None
+            # A short final chunk may continue on the next piece; hold it back with its
+            # trailing whitespace so the joined chunk matches the one-shot result exactly
+            if matches and len(matches[-1].group().split()) < max_words:
+                carry = text[matches.pop().start():]
+            for match in matches:
+                yield match.group()
+        if carry is not None:
+            yield from pattern.findall(carry)
         
     def scrape_docx(self, docx_path):
         if not os.path.exists(docx_path):
             raise FileNotFoundError(f"The file {docx_path} does not exist.")
+        import docx
         doc = docx.Document(docx_path)
         full_text = []
         for para in doc.paragraphs:
@@ -57,12 +118,15 @@ class FileScraper:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"The file {pdf_path} does not exist.")
         
-        full_text = []
+        import pdfplumber
         with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                full_text.append(page.extract_text())
+            n_pages = len(pdf.pages)
+            # Pool workers (local_scrape) and short PDFs stay sequential to avoid nested pools
+            if n_pages < PDF_PARALLEL_MIN_PAGES or SCRAPE_WORKERS < 2 or multiprocessing.parent_process() is not None:
+                # Pages are chunked as they are extracted; no full-document list or join
+                return list(self.iter_chunks(_page_texts(pdf.pages)))
 
-        return self.chunk_text('\n'.join(full_text))
+        return list(self.iter_chunks(_extract_pdf_parallel(pdf_path, n_pages)))
     
     def scrape_html(self, html_path):
         if not os.path.exists(html_path):
@@ -70,195 +134,773 @@ class FileScraper:
         
         with open(html_path, 'r', encoding='utf-8') as file:
             content = file.read()
-        
-        soup = soup(content, 'html.parser')
-        text = soup.get_text()
+
+        # lxml parses in C; BeautifulSoup's pure-Python parser is only the fallback
+        try:
+            import lxml.html
+            doc = lxml.html.fromstring(content)
+            # Script/style bodies aren't document text (BeautifulSoup's get_text skips them too)
+            for element in doc.xpath('//script|//style'):
+                element.drop_tree()
+            text = doc.text_content()
+        except Exception:
+            from bs4 import BeautifulSoup
+            text = BeautifulSoup(content, 'html.parser').get_text()
 
         return self.chunk_text(text)
     
-    def text_scrape(self):
-        #Scrape based on file extension
-        if not os.path.exists(self.file_path):
-            raise FileNotFoundError(f"The file {self.file_path} does not exist.")
-        file_extension = os.path.splitext(self.file_path)[1].lower()
-        if file_extension == '.docx':
-            return self.scrape_docx(self.file_path)
-        elif file_extension == '.pdf':
-            return self.scrape_pdf(self.file_path)
-        elif file_extension == '.html' or file_extension == '.htm':
-            return self.scrape_html(self.file_path)
-        else:
-            if file_extension in ('.txt','.py','.cpp','.java','.json','.csv'):
-                with open(self.file_path, 'r', encoding='utf-8') as file:
-                    return self.chunk_text(file.read())
-            else: 
-                print(f"Unsupported file type: {file_extension}")
+    def scrape_plain(self, text_path):
+        with open(text_path, 'r', encoding='utf-8') as file:
+            return self.chunk_text(file.read())
+
+    _SCRAPERS = {'.docx': scrape_docx, '.pdf': scrape_pdf, '.html': scrape_html, '.htm': scrape_html}
+
+    def text_scrape(self, file_extension=None):
+        #Scrape based on file extension; callers that walked the file already pass its extension
+        if file_extension is None:
+            if not os.path.exists(self.file_path):
+                raise FileNotFoundError(f"The file {self.file_path} does not exist.")
+            file_extension = _file_extension(os.path.basename(self.file_path))
+        if file_extension not in TEXT_EXTENSIONS:
+            print(f"Unsupported file type: {file_extension}")
+            return None
+        return self._SCRAPERS.get(file_extension, FileScraper.scrape_plain)(self, self.file_path)
 
 
 #Text Summarization and Tagging 
 class Summarizer: 
     def __init__(self):
-        self._summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from transformers import pipeline, BlipProcessor, BlipForConditionalGeneration
+        #Image embedding imports (match package path under clarity_api/indexing)
+        from clarity_api.indexing.image_embed import get_image_embedder
+
+        use_cuda = torch.cuda.is_available()
+        self._device = "cuda" if use_cuda else "cpu"
+        # Half precision on GPU halves weight bytes with negligible quality loss; CPU stays FP32
+        self._dtype = torch.float16 if use_cuda else torch.float32
+        self._summarizer = pipeline(
+            "summarization",
+            model="sshleifer/distilbart-cnn-12-6",
+            device=0 if use_cuda else -1,
+            torch_dtype=self._dtype,
+            # Default for every call on this pipeline, so no caller falls back to batch size 1
+            batch_size=SUMMARY_BATCH_SIZE_GPU if use_cuda else SUMMARY_BATCH_SIZE,
+        )
+        self._tok = self._summarizer.tokenizer
         self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
         self._processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        self._model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-        self._image_embedder = ImageEmbedder()
+        self._model = BlipForConditionalGeneration.from_pretrained(
+            "Salesforce/blip-image-captioning-base", torch_dtype=self._dtype
+        ).to(self._device)
+        # Inference only: eval mode and no autograd bookkeeping on the weights
+        self._model.eval().requires_grad_(False)
+        self._image_embedder = get_image_embedder()  # shared with ImageSearcher
+        # Embedding widths, used to give each table a fixed-size Vector column
+        self.text_dim = self._embedder.get_sentence_embedding_dimension()
+        self.image_dim = self._image_embedder.dim
+
+    def _token_windows(self, text_chunks, max_tok=SUMMARY_MAX_TOKENS):
+        """Re-split chunks longer than max_tok tokens; returns (pieces, token counts, index of source chunk)."""
+        pieces, lengths, owners = [], [], []
+        if not text_chunks:
+            return pieces, lengths, owners
+        token_ids = self._tok(list(text_chunks), add_special_tokens=False)["input_ids"]
+        for i, (chunk, ids) in enumerate(zip(text_chunks, token_ids)):
+            if len(ids) <= max_tok:
+                pieces.append(chunk)
+                lengths.append(len(ids))
+                owners.append(i)
+                continue
+            for start in range(0, len(ids), max_tok):
+                window = ids[start:start + max_tok]
+                pieces.append(self._tok.decode(window, skip_special_tokens=True))
+                lengths.append(len(window))
+                owners.append(i)
+        return pieces, lengths, owners
+
+    def chunk_by_tokens(self, text, max_tok=SUMMARY_MAX_TOKENS):
+        """Split text into pieces of at most max_tok summarizer tokens."""
+        return self._token_windows([text], max_tok)[0]
+
+    def _summarize_batch(self, text_chunks, lengths=None, **kwargs):
+        text_chunks = list(text_chunks)
+        if not text_chunks:
+            return []
+        # Feed chunks in token-length order so each pipeline batch pads to similar lengths
+        if lengths is None:
+            lengths = [len(ids) for ids in self._tok(text_chunks, truncation=True)["input_ids"]]
+        order = sorted(range(len(text_chunks)), key=lengths.__getitem__)
+        # One pipeline call for the whole list so chunks are batched through the model
+        outputs = self._summarizer(
+            [text_chunks[i] for i in order],
+            truncation=True,
+            do_sample=False,
+            **kwargs,
+        )
+        summaries = [None] * len(text_chunks)
+        for i, o in zip(order, outputs):
+            summaries[i] = o['summary_text']
+        return summaries
+
+    def embed_texts(self, texts):
+        """Embed a list of strings in one call (L2-normalized); SentenceTransformers length-sorts the batch internally."""
+        return self._embedder.encode(
+            list(texts),
+            batch_size=EMBED_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+    def summarize_many(self, documents):
+        """Summarize several documents (each a list of text chunks) with shared pipeline batches."""
+        # Word chunks from the scrapers are cut down to the model's token budget here, so no
+        # input is silently truncated
+        doc_of_chunk = [d for d, text_chunks in enumerate(documents) for _ in text_chunks]
+        flat_chunks = [chunk for text_chunks in documents for chunk in text_chunks]
+        pieces, lengths, owners = self._token_windows(flat_chunks)
+        doc_summaries = [[] for _ in documents]
+        for owner, summary in zip(owners, self._summarize_batch(pieces, lengths, max_length=500, min_length=1)):
+            doc_summaries[doc_of_chunk[owner]].append(summary)
+
+        # Combined summary can still overflow the model context; re-split once and batch again
+        combined_summaries = [' '.join(summaries) for summaries in doc_summaries]
+        pieces, lengths, owners = self._token_windows(combined_summaries)
+        pieces_per_doc = Counter(owners)
+        overflow = [i for i, owner in enumerate(owners) if pieces_per_doc[owner] > 1]
+        if overflow:
+            resummarized = {}
+            summaries = self._summarize_batch(
+                [pieces[i] for i in overflow], [lengths[i] for i in overflow], max_length=500, min_length=1
+            )
+            for i, summary in zip(overflow, summaries):
+                resummarized.setdefault(owners[i], []).append(summary)
+            for owner, summaries in resummarized.items():
+                combined_summaries[owner] = ' '.join(summaries)
+
+        return self._summarize_batch(combined_summaries, max_length=200, min_length=50)
+
+    def summarize_chunks(self, text_chunks):
+        return self.summarize_many([text_chunks])[0]
 
     def summarize_text(self, text_chunks):
-        all_summaries = []
-        for chunk in text_chunks:
-            summary = self._summarizer(chunk, max_length=500, min_length=1, do_sample=False)
-            all_summaries.append(summary[0]['summary_text'])
-
-        combined_summary = ' '.join(all_summaries)
-        final_summary = self._summarizer(combined_summary, max_length=200, min_length=50, do_sample=False)[0]['summary_text']
-        embeddings = self._embedder.encode(final_summary)
+        final_summary = self.summarize_chunks(text_chunks)
+        embeddings = self.embed_texts([final_summary])[0]
         return embeddings, final_summary
     
     def summarize_image(self, file_path):
-        embeddings = self._image_embedder.embed(file_path)[0].tolist()
+        embeddings = self._image_embedder.embed(file_path)[0]
+        import torch
+        from PIL import Image
         raw_image = Image.open(file_path).convert("RGB")
-        inputs = self._processor(raw_image, return_tensors="pt")
-        with torch.no_grad():
+        # Pixel values follow the model's device/dtype; token ids stay integer
+        inputs = self._processor(raw_image, return_tensors="pt").to(self._device, self._dtype)
+        with torch.inference_mode():
             out = self._model.generate(**inputs)
         summary = self._processor.decode(out[0], skip_special_tokens=True)
         return embeddings, summary
+
+    def summarize_images(self, images):
+        """Caption and embed several images (paths or open RGB images) with one BLIP generate and one CLIP pass."""
+        import torch
+        from PIL import Image
+        raw_images = [Image.open(img).convert("RGB") if isinstance(img, str) else img for img in images]
+        embeddings = self._image_embedder.embed_many(raw_images)
+        inputs = self._processor(raw_images, return_tensors="pt").to(self._device, self._dtype)
+        with torch.inference_mode():
+            out = self._model.generate(**inputs, num_beams=1)
+        summaries = self._processor.batch_decode(out, skip_special_tokens=True)
+        return embeddings, summaries
     
     """Embed a raw user query for search (no summarization)."""
     def summarize_query(self, query: str):
-        embeddings = self._embedder.encode(query)
+        # Unit-length like the indexed vectors, so search can score with a plain dot product
+        embeddings = self._embedder.encode(query, normalize_embeddings=True)
         return embeddings, query
 
 
-    
+
+# Process-wide Summarizer: models are loaded on first use and shared by every manager/searcher
+_summarizer = None
+_summarizer_lock = threading.Lock()
+
+
+def get_summarizer():
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                _summarizer = Summarizer()
+    return _summarizer
+
+
 class LanceDBManager():
 
     def __init__(self, db_path):
         self._db = lancedb.connect(db_path)
+        self._table_names = None
+
+    def _has_table(self, table_name):
+        # table_names() lists the whole catalog; only re-list when a name is not cached yet
+        if self._table_names is None or table_name not in self._table_names:
+            self._table_names = set(self._db.table_names())
+        return table_name in self._table_names
+
+    def _get_summarizer(self):
+        return get_summarizer()
     
     def get_db (self):
         return self._db
     
-    def add_data(self, table_name, file_path):   
-        if table_name in self._db.table_names():
-            scraper = FileScraper(file_path)
-            summarizer = Summarizer()
-            if os.path.splitext(file_path)[1].lower() in ('.png', '.jpg', '.jpeg'):
-                embeddings, summary = summarizer.summarize_image(file_path)
-                file_stats = os.stat(file_path)
-                parent_path = os.path.dirname(file_path)
-                filename = os.path.basename(file_path)
-                file_type = os.path.splitext(filename)[1].lower()
-            else:
-                print(f"Processing text file: {file_path}")
-                text_chunks = scraper.text_scrape()
-                if not text_chunks:
-                    print(f"Skipping {file_path}: No text chunks returned.")
-                    return
-                embeddings, summary = summarizer.summarize_text(text_chunks)
-                if hasattr(embeddings, 'tolist'):
-                    embeddings = embeddings.tolist()
-                file_stats = os.stat(file_path)
-                parent_path = os.path.dirname(file_path)
-                filename = os.path.basename(file_path)
-                file_type = os.path.splitext(filename)[1].lower()
-
-            json_entry = {
-                "Path": file_path,
-                "Parent": parent_path,
-                "Vector": embeddings, 
-                "Name": filename,
-                "When_Created": float(file_stats.st_ctime),
-                "When_Last_Modified": float(file_stats.st_mtime),
-                "Description": summary,
-                "File_type": file_type
-            }
-            self._db.insert(table_name, [json_entry])
+    def _build_entry(self, file_path, summarizer):
+        parent_path, filename = os.path.split(file_path)
+        file_extension = _file_extension(filename)
+        file_kind = FILE_KINDS.get(file_extension)
+        if file_kind is None:
+            print(f"Skipping {file_path}: Unsupported file type {file_extension}")
+            return None
+        file_stats = os.stat(file_path)
+        if not _indexable_size(file_stats):
+            print(f"Skipping {file_path}: Empty or larger than {MAX_FILE_BYTES} bytes")
+            return None
+
+        if file_kind == "image":
+            embeddings, summary = summarizer.summarize_image(file_path)
         else:
+            print(f"Processing text file: {file_path}")
+            text_chunks = FileScraper(file_path).text_scrape(file_extension)
+            if not text_chunks:
+                print(f"Skipping {file_path}: No text chunks returned.")
+                return None
+            embeddings, summary = summarizer.summarize_text(text_chunks)
+
+        return {
+            "Path": file_path,
+            "Parent": parent_path,
+            "Vector": embeddings, 
+            "Name": filename,
+            "When_Created": float(file_stats.st_ctime),
+            "When_Last_Modified": float(file_stats.st_mtime),
+            "Description": summary,
+            "File_type": file_extension,
+            "Size": file_stats.st_size,
+        }
+
+    def add_many(self, table_name, entries):
+        """Append many rows to an existing table in a single LanceDB write."""
+        if not self._has_table(table_name):
+            raise ValueError(f"Table {table_name} does not exist in the database.")
+        _append_rows(self._db.open_table(table_name), entries)
+
+    def add_data(self, table_name, file_path):   
+        if not self._has_table(table_name):
             raise ValueError(f"Table {table_name} does not exist in the database.")  
+        entry = self._build_entry(file_path, self._get_summarizer())
+        if entry is not None:
+            self.add_many(table_name, [entry])
+
+    def add_files(self, table_name, file_paths):
+        """Incrementally index several files, writing them in INSERT_BATCH_SIZE batches."""
+        if not self._has_table(table_name):
+            raise ValueError(f"Table {table_name} does not exist in the database.")
+        summarizer = self._get_summarizer()
+        # One handle for every batch; rows already built are written even if a later file raises
+        table = self._db.open_table(table_name)
+        batch = []
+        try:
+            for file_path in file_paths:
+                try:
+                    entry = self._build_entry(file_path, summarizer)
+                except Exception as e:
+                    print(f"Error processing {file_path}: {e}")
+                    continue
+                if entry is not None:
+                    batch.append(entry)
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    _append_rows(table, batch)
+                    batch.clear()
+        finally:
+            _append_rows(table, batch)
+        _refresh_vector_index(table)
 
     def remove_data(self, table_name, file_path):
-        if table_name not in self._db.table_names():
+        if not self._has_table(table_name):
             raise ValueError(f"Table {table_name} does not exist in the database.")
         
         table = self._db.open_table(table_name)
-        deleted = table.delete(where=f'Path == "{file_path}"')
+        result = table.delete(where=f"Path = {_sql_string(file_path)}")
+        # Older LanceDB releases return None instead of a DeleteResult
+        deleted = getattr(result, "num_deleted_rows", 0) or 0
 
         if deleted > 0:
             print(f"✅ Removed {deleted} row(s) for {file_path} from table '{table_name}'")
         else:
             print(f"⚠️ No entry found for {file_path} in table '{table_name}'")
             
+    def optimize_index(self, table_name):
+        """Fold unindexed rows into the vector index, building it first if the table has none."""
+        table = self.get_table(table_name)
+        _refresh_vector_index(table, min_unindexed=0)
+
     def get_table(self, table_name):
-        if table_name in self._db.table_names():
+        if self._has_table(table_name):
             return self._db.open_table(table_name)
         else:
             raise ValueError(f"Table {table_name} does not exist in the database.")
         
-    def local_scrape(self, text_table_name, image_table_name, root_dir):
-        exclude_dirs = {
-            '/System', '/Library', '/private', '/dev', '/Volumes', '/Applications', '/usr', '/bin', '/sbin', '/etc', '/proc', '/tmp',
-            'C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)', 'C:\\Users\\All Users', 'C:\\ProgramData'
-        }
-        seen_files = set()
-        summarizer = Summarizer()
-        text_data = []
-        image_data = []
-        for dirpath, dirnames, filenames in os.walk(root_dir):
-            # Exclude system directories
-            dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) not in exclude_dirs]
+    def _previous_rows(self, table_name):
+        if not self._has_table(table_name):
+            return None
+        try:
+            return self._db.open_table(table_name).to_arrow()
+        except Exception as e:
+            print(f"Warning: could not read previous rows of '{table_name}': {e}")
+            return None
 
-            
-            for filename in filenames:
-                parent_path = os.path.abspath(dirpath)
-                file_id = os.path.join(parent_path, filename)
-                if file_id in seen_files:
-                    print(f"Skipping already seen file: {file_id}")
-                    continue  
-                seen_files.add(file_id)
-                file_path = os.path.join(dirpath, filename)
-
-                    # Process file
+    def local_scrape(self, text_table_name, image_table_name, root_dir, progress=None):
+        """progress, if given, is called with each per-file "Processing"/"Inserted" line as it is printed."""
+        summarizer = self._get_summarizer()
+
+        def report(line):
+            print(line)
+            if progress is not None:
+                progress(line)
+
+        # Start from empty tables and append as batches fill, instead of one write at the end;
+        # the handles stay open for the whole walk
+        vector_type = pa.from_numpy_dtype(np.dtype(VECTOR_DTYPE))
+        text_schema = make_schema(summarizer.text_dim, vector_type)
+        image_schema = make_schema(summarizer.image_dim, vector_type)
+        # Rows of the previous run are read before the overwrite so unchanged files skip
+        # scraping and summarizing entirely
+        text_cache = _ScrapeCache(self._previous_rows(text_table_name), text_schema)
+        image_cache = _ScrapeCache(self._previous_rows(image_table_name), image_schema)
+        text_table = self._db.create_table(text_table_name, schema=text_schema, mode="overwrite")
+        image_table = self._db.create_table(image_table_name, schema=image_schema, mode="overwrite")
+        self._table_names = None
+        text_data = _ColumnBuffer(text_table.schema)
+        image_data = _ColumnBuffer(image_table.schema)
+
+        def flush_text():
+            if not len(text_data):
+                return
+            # Embed the whole batch of text summaries in one encode call; the (rows, dim)
+            # matrix becomes the Vector column as is
+            text_data.columns["Vector"] = summarizer.embed_texts(text_data.columns["Description"])
+            text_table.add(text_data.to_arrow())
+            text_data.clear()
+
+        def flush_images():
+            if len(image_data):
+                image_table.add(image_data.to_arrow())
+                image_data.clear()
+
+        def add_row(buffer, file_path, parent_path, filename, file_extension, file_stats, embeddings, summary):
+            buffer.append(
+                Path=file_path,
+                Parent=parent_path,
+                Vector=embeddings,
+                Name=filename,
+                When_Created=float(file_stats.st_ctime),
+                When_Last_Modified=float(file_stats.st_mtime),
+                Description=summary,
+                File_type=file_extension,
+                Size=file_stats.st_size,
+            )
+
+        # Text files whose chunks are waiting for a batched summarizer call
+        pending = []
+        pending_chunks = 0
+
+        def flush_pending():
+            nonlocal pending_chunks
+            if not pending:
+                return
+            try:
+                summaries = summarizer.summarize_many([chunks for _, chunks in pending])
+                results = [(file_info, summary) for (file_info, _), summary in zip(pending, summaries)]
+            except Exception:
+                # One bad file shouldn't drop the batch; retry one by one to isolate it
+                results = []
+                for file_info, chunks in pending:
+                    try:
+                        results.append((file_info, summarizer.summarize_many([chunks])[0]))
+                    except Exception as e:
+                        print(f"Error processing {file_info[0]}: {e}")
+            for file_info, summary in results:
+                # Embedded together with the rest of the batch in flush_text
+                add_row(text_data, *file_info, None, summary)
+                report(f"Inserted data for {file_info[0]} into table '{text_table_name}'")
+                if len(text_data) >= INSERT_BATCH_SIZE:
+                    flush_text()
+            pending.clear()
+            pending_chunks = 0
+
+        # Images waiting for a batched caption/embedding call, and batches already handed to
+        # the reader threads so decoding overlaps the models working on the previous batch
+        pending_images = []
+        loading = deque()
+
+        def embed_loaded_images(batch, futures):
+            file_infos, images = [], []
+            for file_info, future in zip(batch, futures):
                 try:
-                    scraper = FileScraper(file_path)
-                    is_image = False 
-                    if os.path.splitext(filename)[1].lower() in ('.png', '.jpg', '.jpeg'):
-                        is_image = True   
-                        embeddings, summary = summarizer.summarize_image(file_path)
-                        print(f"Inserted data for {file_path} into table '{image_table_name}'")
-                    else:
-                        print(f"Processing text file: {file_path}")
-                        text_chunks = scraper.text_scrape()
-                        if not text_chunks:
-                            print(f"Skipping {file_path}: No text chunks returned.")
-                            continue
-                        embeddings, summary = summarizer.summarize_text(text_chunks)
-                        if hasattr(embeddings, 'tolist'):
-                            embeddings = embeddings.tolist()
-
-                    file_stats = os.stat(file_path)
-                    file_type = os.path.splitext(filename)[1].lower()
-                    json_entry = {
-                        "Path": file_path,
-                        "Parent": parent_path,
-                        "Vector": embeddings,
-                        "Name": filename,
-                        "When_Created": float(file_stats.st_ctime),
-                        "When_Last_Modified": float(file_stats.st_mtime),
-                        "Description": summary,
-                        "File_type": file_type
-                    }
-                    text_data.append(json_entry) if not is_image else image_data.append(json_entry)
-                    if is_image:
-                        print(f"Inserted data for {file_path} into table '{image_table_name}'")
-                    else:
-                        print(f"Inserted data for {file_path} into table '{text_table_name}'")
+                    images.append(future.result())
+                    file_infos.append(file_info)
                 except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+                    print(f"Error processing {file_info[0]}: {e}")
+            if not images:
+                return
+            try:
+                embeddings, summaries = summarizer.summarize_images(images)
+                results = zip(file_infos, embeddings, summaries)
+            except Exception:
+                # One bad image shouldn't drop the batch; retry one by one to isolate it
+                results = []
+                for file_info in file_infos:
+                    try:
+                        results.append((file_info, *summarizer.summarize_image(file_info[0])))
+                    except Exception as e:
+                        print(f"Error processing {file_info[0]}: {e}")
+            for file_info, embeddings, summary in results:
+                add_row(image_data, *file_info, embeddings, summary)
+                report(f"Inserted data for {file_info[0]} into table '{image_table_name}'")
+                if len(image_data) >= INSERT_BATCH_SIZE:
+                    flush_images()
+
+        def flush_pending_images(drain=False):
+            if pending_images:
+                batch = list(pending_images)
+                loading.append((batch, [image_reader.submit(_load_image, info[0]) for info in batch]))
+                pending_images.clear()
+            # Keep at most IMAGE_PREFETCH_BATCHES decoded batches in memory
+            while len(loading) > (0 if drain else IMAGE_PREFETCH_BATCHES):
+                embed_loaded_images(*loading.popleft())
+
+        def collect(future, file_info):
+            nonlocal pending_chunks
+            try:
+                text_chunks = future.result()
+            except Exception as e:
+                print(f"Error processing {file_info[0]}: {e}")
+                return
+            if not text_chunks:
+                print(f"Skipping {file_info[0]}: No text chunks returned.")
+                return
+            pending.append((file_info, text_chunks))
+            pending_chunks += len(text_chunks)
+            if pending_chunks >= SUMMARY_FLUSH_CHUNKS:
+                flush_pending()
+
+        try:
+            # Text extraction fans out to worker processes and image decoding to reader threads;
+            # models stay in this process and are never inherited by the workers (see _worker_context)
+            with ProcessPoolExecutor(max_workers=SCRAPE_WORKERS, mp_context=_worker_context()) as pool, \
+                    ThreadPoolExecutor(max_workers=IMAGE_READ_WORKERS) as image_reader:
+                in_flight = {}
+                for file_info in _iter_files(root_dir, EXCLUDE_DIRS):
+                    file_path = file_info[0]
+                    is_image = FILE_KINDS[file_info[3]] == "image"
+                    table_name, table, cache = (
+                        (image_table_name, image_table, image_cache) if is_image
+                        else (text_table_name, text_table, text_cache)
+                    )
+                    if cache.reuse(file_path, file_info[4]):
+                        report(f"Inserted data for {file_path} into table '{table_name}' (unchanged)")
+                        if len(cache) >= INSERT_BATCH_SIZE:
+                            cache.flush(table)
+                        continue
+
+                    if is_image:
+                        pending_images.append(file_info)
+                        if len(pending_images) >= IMAGE_BATCH_SIZE:
+                            flush_pending_images()
+                        continue
+
+                    report(f"Processing text file: {file_path}")
+                    in_flight[pool.submit(_scrape_text_file, file_path, file_info[3])] = file_info
+                    # Bound the number of queued files so extracted text doesn't pile up in memory
+                    if len(in_flight) >= SCRAPE_WORKERS * 4:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future, in_flight.pop(future))
+
+                for future in as_completed(in_flight):
+                    collect(future, in_flight[future])
+                flush_pending()
+                flush_pending_images(drain=True)
+        finally:
+            # Rows already built are written even if the walk is interrupted, so the
+            # tables hold everything processed up to that point
+            flush_text()
+            flush_images()
+            text_cache.flush(text_table)
+            image_cache.flush(image_table)
+
+        # Build the ANN index once over the committed rows rather than per insert
+        _build_vector_index(text_table)
+        _build_vector_index(image_table)
+
+
+@lru_cache(maxsize=None)
+def _chunk_pattern(max_words):
+    """Compiled regex matching up to max_words whitespace-separated words."""
+    return re.compile(r"\S+(?:\s+\S+){0,%d}" % (max_words - 1))
+
+
+def _sql_string(value):
+    """Quote value as a SQL string literal for LanceDB filters (backslashes need no escaping)."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _columns_to_table(columns, table_schema):
+    """Build an Arrow table from per-column value lists; vectors stay numpy until one contiguous copy."""
+    arrays = []
+    for field in table_schema:
+        values = columns.get(field.name)
+        if values is None:
+            arrays.append(pa.nulls(len(columns["Path"]), type=field.type))
+        elif field.name == "Vector" and pa.types.is_fixed_size_list(field.type):
+            dtype = field.type.value_type.to_pandas_dtype()
+            flat = pa.array(np.asarray(values, dtype=dtype).reshape(-1))
+            arrays.append(pa.FixedSizeListArray.from_arrays(flat, field.type.list_size))
+        elif field.name == "Vector":
+            dtype = field.type.value_type.to_pandas_dtype()
+            arrays.append(_variable_vectors(values, dtype, field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=table_schema)
+
+
+def _variable_vectors(values, dtype, list_type):
+    """Variable-length list column; equally sized vectors are written from one flat buffer via offsets."""
+    if len(values) and all(v is not None for v in values) and len({len(v) for v in values}) == 1:
+        matrix = np.asarray(values, dtype=dtype)
+        if matrix.ndim == 2 and matrix.shape[1] > 0:
+            offsets = pa.array(np.arange(0, matrix.size + 1, matrix.shape[1], dtype=np.int32))
+            return pa.ListArray.from_arrays(offsets, pa.array(matrix.reshape(-1)), type=list_type)
+    return pa.array([None if v is None else np.asarray(v, dtype=dtype) for v in values], type=list_type)
+
+
+def _rows_to_table(entries, table_schema):
+    """Arrow table for a list of row dicts (see _columns_to_table)."""
+    return _columns_to_table(
+        {name: [entry.get(name) for entry in entries] for name in table_schema.names}, table_schema
+    )
+
+
+class _ColumnBuffer:
+    """Struct-of-arrays row buffer for one table: one list per column, converted on flush."""
+
+    def __init__(self, table_schema):
+        self.schema = table_schema
+        self.clear()
+
+    def __len__(self):
+        return len(self.columns["Path"])
+
+    def append(self, **values):
+        for name, column in self.columns.items():
+            column.append(values.get(name))
+
+    def to_arrow(self):
+        return _columns_to_table(self.columns, self.schema)
+
+    def clear(self):
+        self.columns = {name: [] for name in self.schema.names}
+
+
+class _ScrapeCache:
+    """Rows of a previous local_scrape, reused for files whose timestamps and size are unchanged."""
+
+    def __init__(self, previous, table_schema):
+        self.hits = []
+        self.index = {}
+        self.rows = None
+        # A different model or vector dtype invalidates every stored vector (as does a table
+        # from before a schema change)
+        if previous is None or any(
+            previous.schema.get_field_index(field.name) < 0
+            or previous.schema.field(field.name).type != field.type
+            for field in table_schema
+        ):
+            return
+        self.rows = previous.select(table_schema.names)
+        self.index = {
+            path: (i, created, modified, size)
+            for i, (path, created, modified, size) in enumerate(zip(
+                self.rows.column("Path").to_pylist(),
+                self.rows.column("When_Created").to_pylist(),
+                self.rows.column("When_Last_Modified").to_pylist(),
+                self.rows.column("Size").to_pylist(),
+            ))
+        }
+
+    def __len__(self):
+        return len(self.hits)
+
+    def reuse(self, file_path, file_stats):
+        """Queue the stored row for file_path if its ctime, mtime and size still match."""
+        hit = self.index.get(file_path)
+        if hit is None or hit[1:] != (float(file_stats.st_ctime), float(file_stats.st_mtime), file_stats.st_size):
+            return False
+        self.hits.append(hit[0])
+        return True
+
+    def flush(self, table):
+        if self.hits:
+            table.add(self.rows.take(self.hits))
+            self.hits.clear()
+
+
+def _append_rows(table, entries):
+    """Append row dicts to an open LanceDB table as one Arrow batch (no pandas round-trip)."""
+    if entries:
+        table.add(_rows_to_table(entries, table.schema))
+
+
+def _build_vector_index(table):
+    rows = table.count_rows()
+    if rows < VECTOR_INDEX_MIN_ROWS:
+        return False
+    dim = table.schema.field("Vector").type.list_size
+    if dim <= 0:
+        return False
+    num_sub_vectors = next(n for n in (16, 8, 4, 2, 1) if dim % n == 0)
+    try:
+        table.create_index(
+            metric="cosine",
+            vector_column_name="Vector",
+            index_type="IVF_PQ",
+            num_partitions=min(256, max(1, int(rows ** 0.5))),
+            num_sub_vectors=num_sub_vectors,
+            replace=True,
+        )
+    except Exception as e:
+        print(f"Warning: could not build vector index: {e}")
+        return False
+    return True
+
+
+def _refresh_vector_index(table, min_unindexed=REINDEX_UNINDEXED_ROWS):
+    try:
+        indices = [index for index in table.list_indices() if "Vector" in index.columns]
+        if not indices:
+            return _build_vector_index(table)
+        if table.index_stats(indices[0].name).num_unindexed_rows < max(1, min_unindexed):
+            return False
+        table.optimize()
+    except Exception as e:
+        print(f"Warning: could not refresh vector index: {e}")
+        return False
+    return True
+
+
+def _file_extension(name):
+    """Lower-cased extension of a file name, with its dot; dotfiles have none (as os.path.splitext)."""
+    dot = name.rfind('.')
+    return name[dot:].lower() if dot > 0 else ''
+
+
+def _indexable_size(file_stats):
+    return 0 < file_stats.st_size <= MAX_FILE_BYTES
+
+
+def _iter_files(root_dir, exclude_dirs):
+    """Walk root_dir, yielding (file_path, parent_path, filename, extension, stat) once per
+    supported file; other extensions and empty/oversized files are never opened."""
+    # Compare in normalized form so 'C:/windows' or a trailing separator still matches; normcase
+    # is the identity on POSIX, so this costs nothing there
+    excluded = frozenset(os.path.normcase(os.path.normpath(d)) for d in exclude_dirs)
+    # Explicit stack over os.scandir: DirEntry type checks come from the directory read itself
+    stack = [root_dir]
+    # Identity of every file already yielded, so hardlinks/symlinks to one file are indexed once
+    seen_files = set()
+    while stack:
+        dirpath = stack.pop()
+        parent_path = os.path.abspath(dirpath)
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            # Unreadable directories are skipped, as os.walk did
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Exclude system directories
+                    if os.path.normcase(os.path.normpath(entry.path)) not in excluded:
+                        stack.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            file_extension = _file_extension(entry.name)
+            if file_extension not in FILE_KINDS:
+                continue
+            try:
+                file_stats = entry.stat()
+            except OSError as e:
+                print(f"Error processing {entry.path}: {e}")
+                continue
+            # Windows' cached DirEntry stat has no inode number; fall back to the path there
+            file_id = (file_stats.st_dev, file_stats.st_ino) if file_stats.st_ino else entry.path
+            if file_id in seen_files:
+                print(f"Skipping already seen file: {entry.path}")
+                continue
+            seen_files.add(file_id)
+            if not _indexable_size(file_stats):
+                print(f"Skipping {entry.path}: Empty or larger than {MAX_FILE_BYTES} bytes")
+                continue
+            yield entry.path, parent_path, entry.name, file_extension, file_stats
+
+
+def _load_image(file_path):
+    """Decode an image to RGB; run on the reader threads (PIL releases the GIL while decoding)."""
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return img.convert("RGB")
+
+
+def _worker_context():
+    """Start method for extraction pools: fresh interpreters that import only the document
+    parsers, instead of forks that inherit the parent's loaded models and LanceDB runtime."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _extract_pdf_pages(job):
+    """Process-pool worker: extract text for pages [start, stop) of a PDF."""
+    pdf_path, start, stop = job
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return list(_page_texts(pdf.pages[start:stop]))
+
+
+def _extract_pdf_parallel(pdf_path, n_pages):
+    """Yield the text of every page of a large PDF, extracted in contiguous ranges, one per worker."""
+    workers = min(SCRAPE_WORKERS, n_pages)
+    step = -(-n_pages // workers)
+    jobs = [(pdf_path, start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    with ProcessPoolExecutor(max_workers=len(jobs), mp_context=_worker_context()) as ex:
+        for texts in ex.map(_extract_pdf_pages, jobs):
+            yield from texts
+
+
+def _page_texts(pages):
+    """Yield each pdfplumber page's text, releasing the page's parsed objects right after."""
+    for page in pages:
+        text = page.extract_text() or ""
+        page.close()
+        yield text
+
 
-        #Create text and image tables
-        self._db.create_table(text_table_name, schema=schema, data = text_data, mode="overwrite")
-        self._db.create_table(image_table_name, schema=schema, data = image_data, mode="overwrite")
+def _scrape_text_file(file_path, file_extension):
+    """Process-pool worker: extract text chunks for a single file."""
+    return FileScraper(file_path).text_scrape(file_extension)
 
 
 if __name__ == "__main__":
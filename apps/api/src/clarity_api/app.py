@@ -1,51 +1,89 @@
+from contextlib import asynccontextmanager
+import asyncio
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-import uvicorn
-
-from .routes.tree import router as tree_router
-from .routes.rename import router as rename_router
-from .routes.refresh import router as refresh_router
-from .routes.delete import router as delete_router
-from .routes.create import router as create_router
-from .routes.index import router as index_router
-from .routes.clear import router as clear_router
-from .routes.search_text import router as search_text_router
-from .routes.search_image import router as search_image_router
-
-app = FastAPI(
-    title="Clarity API",
-    description="API for Clarity search and indexing system",
-    version="0.1.0"
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(tree_router, tags=["tree"])
-app.include_router(rename_router, tags=["rename"])
-app.include_router(refresh_router, tags=["refresh"])
-app.include_router(delete_router, tags=["delete"])
-app.include_router(create_router, tags=["create"])
-app.include_router(index_router, tags=["index"])
-app.include_router(clear_router, tags=["clear"])
-app.include_router(search_text_router, tags=["search-text"])
-app.include_router(search_image_router, tags=["search-image"])
-
-@app.get("/")
-async def root():
-    return {"message": "Clarity API is running"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+from dotenv import load_dotenv, find_dotenv
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # OPTIMIZE_INTERVAL_S > 0 compacts the tables and refreshes their indexes on a timer
+    from .routes.optimize import optimize_periodically
+
+    interval = float(os.getenv("OPTIMIZE_INTERVAL_S", 0))
+    task = asyncio.create_task(optimize_periodically(interval)) if interval > 0 else None
+    yield
+    if task is not None:
+        task.cancel()
+
+
+def create_app() -> FastAPI:
+    # .env is located and loaded once here rather than by every route module
+    load_dotenv(find_dotenv())
+
+    # Route modules import their heavy dependencies (LanceDB, pandas, models) inside the
+    # handlers, so building the app only pays for FastAPI itself
+    from .routes.tree import router as tree_router
+    from .routes.rename import router as rename_router
+    from .routes.refresh import router as refresh_router
+    from .routes.delete import router as delete_router
+    from .routes.create import router as create_router
+    from .routes.index import router as index_router
+    from .routes.clear import router as clear_router
+    from .routes.search_text import router as search_text_router
+    from .routes.search_image import router as search_image_router
+    from .routes.optimize import router as optimize_router
+
+    app = FastAPI(
+        title="Clarity API",
+        description="API for Clarity search and indexing system",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure appropriately for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Tree payloads from /index and /refresh are large and compress well; /tree sends its own
+    # pre-compressed body, which the middleware passes through untouched
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+    # Include routers
+    app.include_router(tree_router, tags=["tree"])
+    app.include_router(rename_router, tags=["rename"])
+    app.include_router(refresh_router, tags=["refresh"])
+    app.include_router(delete_router, tags=["delete"])
+    app.include_router(create_router, tags=["create"])
+    app.include_router(index_router, tags=["index"])
+    app.include_router(clear_router, tags=["clear"])
+    app.include_router(search_text_router, tags=["search-text"])
+    app.include_router(search_image_router, tags=["search-image"])
+    app.include_router(optimize_router, tags=["admin"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "Clarity API is running"}
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from functools import lru_cache
+
+
+# Connections and table handles are shared by every request in the API process. Reads check
+# for a newer table version each time (read_consistency_interval=0), so writes made by the
+# scrape subprocess, the tree builder or another handler are never missed.
+
+@lru_cache(maxsize=4)
+def get_db(db_path: str):
+    """LanceDB connection for db_path, opened once per process."""
+    import lancedb
+
+    return lancedb.connect(db_path, read_consistency_interval=timedelta(0))
+
+
+@lru_cache(maxsize=16)
+def get_table(db_path: str, table_name: str):
+    """Open table handle; callers check `table_name in get_db(db_path).table_names()` first."""
+    return get_db(db_path).open_table(table_name)
+
+
+@lru_cache(maxsize=16)
+def ensure_vector_index(db_path: str, table_name: str) -> bool:
+    """
+    Builds the table's Vector index if it has none, checked once per process. The scraper
+    indexes tables it writes; this covers tables written before it did. Returns whether one was built.
+    """
+    from FileScraper import _build_vector_index
+
+    table = get_table(db_path, table_name)
+    try:
+        if any("Vector" in index.columns for index in table.list_indices()):
+            return False
+    except Exception:
+        return False
+    return _build_vector_index(table)
+
+
+def invalidate() -> None:
+    """
+    Forget cached handles after a table is replaced or the database directory removed, along
+    with cached search results: a recreated table starts again from the same version numbers,
+    so results keyed by the old table's version would otherwise be served for the new one.
+    """
+    from clarity_api.search.query_cache import image_results, text_results
+
+    text_results.clear()
+    image_results.clear()
+    ensure_vector_index.cache_clear()
+    get_table.cache_clear()
+    get_db.cache_clear()
@@ -3,6 +3,9 @@ import json
 from datetime import datetime
 from image_embed import ImageEmbedder
 
+# Images embedded per ImageEmbedder.embed_batch call
+BATCH_SIZE = 32
+
 # Where to scan for images
 ROOT_DIR = "data/sample_images"   # change this to wherever your images live
 DB_PATH = "data/index/image_db.json"
@@ -18,9 +21,9 @@ def is_system_file(fname: str) -> bool:
         or fname.lower() in ["thumbs.db", "desktop.ini"]  # Windows system files
     )
 
-def embed_image_file(path: str):
-    """Create a JSON DB entry for one image file."""
-    vec = embedder.embed(path)[0].tolist()  # numpy -> python list
+def image_entry(path: str, vec):
+    """Create a JSON DB entry for one image file from its embedding."""
+    vec = vec.tolist()  # numpy -> python list
 
     # Detect file type based on extension
     ext = os.path.splitext(path)[1].lower()
@@ -44,7 +47,8 @@ def embed_image_file(path: str):
     }
     return entry
 
-# Walk the folder tree
+# Walk the folder tree, gathering image paths first so they can be embedded in batches
+paths = []
 for root, _, files in os.walk(ROOT_DIR):
     for fname in files:
         if is_system_file(fname):
@@ -53,13 +57,26 @@ for root, _, files in os.walk(ROOT_DIR):
 
         # Only accept .jpg/.jpeg/.png
         if fname.lower().endswith((".jpg", ".jpeg", ".png")):
-            path = os.path.join(root, fname)
+            paths.append(os.path.join(root, fname))
+
+for start in range(0, len(paths), BATCH_SIZE):
+    batch = paths[start:start + BATCH_SIZE]
+    try:
+        vecs = embedder.embed_batch(batch, batch_size=BATCH_SIZE)
+    except Exception:
+        # Retry one by one so a single unreadable image only skips itself
+        vecs = []
+        for path in batch:
             try:
-                entry = embed_image_file(path)
-                db.append(entry)
-                print(f"Indexed {fname}")
+                vecs.append(embedder.embed(path)[0])
             except Exception as e:
-                print(f"Skipped {fname}: {e}")
+                print(f"Skipped {os.path.basename(path)}: {e}")
+                vecs.append(None)
+    for path, vec in zip(batch, vecs):
+        if vec is None:
+            continue
+        db.append(image_entry(path, vec))
+        print(f"Indexed {os.path.basename(path)}")
 
 # Save JSON DB
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -1,4 +1,5 @@
 import os
+import threading
 import numpy as np
 from PIL import Image
 
@@ -9,6 +10,9 @@ except Exception:
     class _DefaultSettings:
         IMAGE_BACKEND = os.getenv("IMAGE_BACKEND", "torch")
         IMAGE_MODEL = os.getenv("IMAGE_MODEL", "openai/clip-vit-base-patch32")
+        # Preferred ONNX Runtime providers, first available wins; CPU is always kept as fallback
+        IMAGE_ONNX_PROVIDERS = os.getenv("IMAGE_ONNX_PROVIDERS", "QNNExecutionProvider,CPUExecutionProvider")
+        QNN_BACKEND_PATH = os.getenv("QNN_BACKEND_PATH", "QnnHtp.dll")
 
     settings = _DefaultSettings()
 
@@ -27,54 +31,86 @@ class ImageEmbedder:
 
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
             self.model = CLIPModel.from_pretrained(self.model_path).to(self.device)
+            # Inference only: drop autograd bookkeeping on the weights
+            self.model.eval().requires_grad_(False)
             self.processor = CLIPProcessor.from_pretrained(self.model_path)
+            self.dim = self.model.config.projection_dim
 
         elif self.backend == "onnx":
             # SNAPDRAGON DEPLOYMENT
             # Qualcomm ONNX model backend
             import onnxruntime as ort
 
-            self.session = ort.InferenceSession(self.model_path)
+            self.session = ort.InferenceSession(self.model_path, providers=_onnx_providers(ort))
             self.input_name = self.session.get_inputs()[0].name
+            # FP16-converted models take half-precision pixels; INT8 (dynamic) models keep FP32 inputs
+            self.input_dtype = np.float16 if self.session.get_inputs()[0].type == "tensor(float16)" else np.float32
             #confirm which output layer gives embeddings
             self.output_name = self.session.get_outputs()[-2].name
+            # A fixed batch dimension in the exported graph caps how many images go per run
+            batch_dim = self.session.get_inputs()[0].shape[0]
+            self.onnx_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+            # Symbolic (dynamic) output shapes leave the width unknown until the first embed
+            out_dim = self.session.get_outputs()[-2].shape[-1]
+            self.dim = out_dim if isinstance(out_dim, int) else None
         else:
             raise ValueError(f"Unsupported backend: {self.backend}")
 
     def embed(self, image_path: str) -> np.ndarray:
         """Generate an embedding vector for the given image."""
-        img = Image.open(image_path).convert("RGB")
+        return self.embed_many([image_path])
+
+    def embed_many(self, images) -> np.ndarray:
+        """Embed several images (paths or already-open PIL images) in one forward pass."""
+        imgs = [Image.open(img).convert("RGB") if isinstance(img, str) else img for img in images]
 
         if self.backend == "torch":
             # TESTING PURPOSES
             # HuggingFace CLIP embedding flow
             import torch
-            inputs = self.processor(images=img, return_tensors="pt").to(self.device)
-            with torch.no_grad():
+            inputs = self.processor(images=imgs, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
                 vec = self.model.get_image_features(**inputs)
             vec = vec.cpu().numpy().astype("float32")
 
         elif self.backend == "onnx":
             # SNAPDRAGON DEPLOYMENT
-            # Preprocess + run ONNX model
-            arr = np.array(img.resize((224, 224))).astype("float32") / 255.0
-            arr = arr.transpose(2, 0, 1)  # HWC -> CHW
-            arr = np.expand_dims(arr, axis=0)  # batch dimension
-            vec = self.session.run([self.output_name], {self.input_name: arr})[0]
+            # Preprocess into one preallocated NCHW buffer, scaling in place
+            buf = np.empty((len(imgs), 3, 224, 224), dtype=self.input_dtype)
+            for i, img in enumerate(imgs):
+                hwc = np.asarray(img.resize((224, 224)), dtype=np.float32)
+                np.multiply(hwc.transpose(2, 0, 1), 1.0 / 255.0, out=buf[i], casting="same_kind")  # HWC -> CHW
+            step = self.onnx_batch or len(imgs)
+            vec = np.concatenate([
+                self.session.run([self.output_name], {self.input_name: buf[i:i + step]})[0]
+                for i in range(0, len(imgs), step)
+            ], axis=0).astype(np.float32, copy=False)
 
         # Normalize vector (cosine similarity works best on unit vectors)
         norm = np.linalg.norm(vec, axis=1, keepdims=True)
-        vec = vec / (norm + 1e-10)  # 1e-10 = safety against div/0
+        vec /= norm + 1e-10  # 1e-10 = safety against div/0
 
         return vec
 
+    def embed_batch(self, image_paths, batch_size: int = 32) -> np.ndarray:
+        """Embed any number of images, batch_size at a time; rows follow image_paths."""
+        if not image_paths:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.concatenate([
+            self.embed_many(image_paths[i:i + batch_size]) for i in range(0, len(image_paths), batch_size)
+        ], axis=0)
+
     def embed_text(self, text: str) -> np.ndarray:
         """Generate an embedding vector for the given text using CLIP."""
+        return self.embed_texts([text])
+
+    def embed_texts(self, texts) -> np.ndarray:
+        """Embed several texts with CLIP in one forward pass, one row per text."""
         if self.backend == "torch":
             # HuggingFace CLIP text embedding
             import torch
-            inputs = self.processor(text=[text], return_tensors="pt", padding=True).to(self.device)
-            with torch.no_grad():
+            inputs = self.processor(text=list(texts), return_tensors="pt", padding=True).to(self.device)
+            with torch.inference_mode():
                 vec = self.model.get_text_features(**inputs)
             vec = vec.cpu().numpy().astype("float32")
             
@@ -88,4 +124,51 @@ class ImageEmbedder:
         norm = np.linalg.norm(vec, axis=1, keepdims=True)
         vec = vec / (norm + 1e-10)  # 1e-10 = safety against div/0
 
-        return vec
\ No newline at end of file
+        return vec
+
+
+# Process-wide embedder: the CLIP weights are loaded once and shared by indexing and search
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_image_embedder():
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = ImageEmbedder()
+    return _embedder
+
+
+def _onnx_providers(ort):
+    """Configured execution providers that this onnxruntime build offers, CPU last."""
+    available = set(ort.get_available_providers())
+    providers = []
+    configured = getattr(settings, "IMAGE_ONNX_PROVIDERS", "QNNExecutionProvider,CPUExecutionProvider")
+    for name in configured.split(","):
+        name = name.strip()
+        if name not in available or name == "CPUExecutionProvider":
+            continue
+        if name == "QNNExecutionProvider":
+            providers.append((name, {"backend_path": getattr(settings, "QNN_BACKEND_PATH", "QnnHtp.dll")}))
+        else:
+            providers.append(name)
+    providers.append("CPUExecutionProvider")
+    return providers
+
+
+def quantize_onnx_model(model_in: str, model_out: str, precision: str = "int8") -> str:
+    """Write an INT8 (dynamic weight quantization) or FP16 copy of an ONNX CLIP model."""
+    if precision == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_in, model_out, weight_type=QuantType.QInt8)
+    elif precision == "fp16":
+        import onnx
+        from onnxconverter_common import float16
+
+        onnx.save(float16.convert_float_to_float16(onnx.load(model_in)), model_out)
+    else:
+        raise ValueError(f"Unsupported precision: {precision}")
+    return model_out
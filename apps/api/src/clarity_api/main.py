@@ -1,11 +1,10 @@
-from fastapi import FastAPI
-from .app import app as _app
+from .app import create_app
 
 # Simple module entry point: `python -m clarity_api.main`
-app: FastAPI = _app
-
 if __name__ == "__main__":
+    import multiprocessing
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8001)
-
 
+    # Scrape worker pools start fresh interpreters; frozen builds must dispatch those here
+    multiprocessing.freeze_support()
+    uvicorn.run(create_app(), host="127.0.0.1", port=8001)
@@ -1,15 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import os
 import shutil
+import subprocess
 from typing import Optional
-from dotenv import load_dotenv, find_dotenv
 
 
 router = APIRouter()
 
-load_dotenv(find_dotenv())
-
 
 class ClearRequest(BaseModel):
     db_path: Optional[str] = None
@@ -17,15 +16,38 @@ class ClearRequest(BaseModel):
     output_path: Optional[str] = None  # Tree JSON relative to project src by default
 
 
-def _resolve_project_src_dir() -> str:
-    routes_dir = os.path.dirname(__file__)
-    return os.path.normpath(os.path.join(routes_dir, "../../"))
+# Resolved once at import; handlers only consult the environment for overrides
+ROUTES_DIR = os.path.dirname(__file__)
+PROJECT_SRC_DIR = os.path.normpath(os.path.join(ROUTES_DIR, "../../"))
+DB_PATH_DEFAULT = os.path.normpath(os.path.join(ROUTES_DIR, "../../../data/index"))
+OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
+
+
+# Absolute path to rm, so subprocess can use posix_spawn instead of forking the (model-sized) API process
+_RM = shutil.which("rm") if os.name == "posix" else None
+
+
+def fast_rmtree(path: str, ignore_errors: bool = False) -> None:
+    """
+    Remove a directory tree, using the native `rm -rf` on POSIX (much faster than a Python walk
+    over a large LanceDB fragment directory) and shutil.rmtree elsewhere or if rm fails.
+    """
+    if _RM:
+        try:
+            # close_fds=False is what lets CPython take the posix_spawn path; our own fds are
+            # non-inheritable (PEP 446), so nothing leaks into rm
+            subprocess.run([_RM, "-rf", "--", path], check=True, capture_output=True, close_fds=False)
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        if not os.path.lexists(path):
+            return
+    shutil.rmtree(path, ignore_errors=ignore_errors)
 
 
 def _remove_path_safely(path: str) -> None:
     try:
         if os.path.isdir(path):
-            shutil.rmtree(path, ignore_errors=True)
+            fast_rmtree(path, ignore_errors=True)
         elif os.path.isfile(path):
             os.remove(path)
     except Exception as e:
@@ -41,23 +63,20 @@ async def clear_data(req: ClearRequest):
       - OUTPUT_PATH from env or "../data/file_tree.json"
     """
     try:
-        project_src_dir = _resolve_project_src_dir()
-        if req.db_path:
-            db_path = req.db_path
-        else:
-            # Use relative path from the API routes directory
-            routes_dir = os.path.dirname(__file__)
-            default_db_path = os.path.normpath(os.path.join(routes_dir, "../../../data/index"))
-            db_path = os.getenv("DB_PATH", default_db_path)
-        output_path = req.output_path or os.getenv("OUTPUT_PATH", "../data/file_tree.json")
-
-        # Clear LanceDB directory
+        db_path = req.db_path or os.getenv("DB_PATH", DB_PATH_DEFAULT)
+        output_path = req.output_path or os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT)
+
+        # Clear LanceDB directory; cached handles point into it. Removing a large index can
+        # take a while, so it runs in a worker thread rather than on the event loop
+        from clarity_api.db import invalidate
+
         db_abs = os.path.abspath(db_path)
         if os.path.exists(db_abs):
-            _remove_path_safely(db_abs)
+            await asyncio.to_thread(_remove_path_safely, db_abs)
+        invalidate()
 
         # Remove tree JSON file (path relative to project src)
-        tree_abs = os.path.normpath(os.path.join(project_src_dir, output_path))
+        tree_abs = os.path.normpath(os.path.join(PROJECT_SRC_DIR, output_path))
         if os.path.exists(tree_abs):
             _remove_path_safely(tree_abs)
 
@@ -1,5 +1,6 @@
 import os
-import shutil
+
+from clear import fast_rmtree
 
 # Database path
 db_path = "../../data"
@@ -8,7 +9,7 @@ def clear_entire_database():
     """Delete the entire database directory"""
     abs_path = os.path.abspath(db_path)
     if os.path.exists(abs_path):
-        shutil.rmtree(abs_path)
+        fast_rmtree(abs_path)
         print(f"Entire database deleted at: {abs_path}")
         return True
     else:
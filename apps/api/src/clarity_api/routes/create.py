@@ -1,17 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import os
+import re
 import sys
-import subprocess
 import time
-import lancedb
-import pyarrow as pa
-from dotenv import load_dotenv, find_dotenv
 import shutil
 
 router = APIRouter()
 
-load_dotenv(find_dotenv())
 
 # Use relative path from the API routes directory
 def get_default_db_path():
@@ -20,6 +17,12 @@ def get_default_db_path():
 
 DB_PATH_DEFAULT = get_default_db_path()
 DB_TABLE_DEFAULT = "Hello"
+OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
+
+# tree_creation.py lives in apps/api/src; the tree is built in-process from there
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "../.."))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 
 class CreateFolderRequest(BaseModel):
@@ -27,26 +30,35 @@ class CreateFolderRequest(BaseModel):
     name: str         # folder name only
 
 
+# Runs of path separators (and existing '|' delimiters) collapse to a single '|'
+_SEP_RE = re.compile(r"[\\/|]+")
+
+
 def normalize_path(path: str) -> str:
     if not path:
         return ""
-    s = str(path).replace("\\", "|").replace("/", "|")
-    while "||" in s:
-        s = s.replace("||", "|")
-    return s.strip("|")
+    return _SEP_RE.sub("|", str(path)).strip("|")
 
 
-def regenerate_tree():
-    routes_dir = os.path.dirname(__file__)
-    script_path = os.path.normpath(os.path.join(routes_dir, "../../tree_creation.py"))
-    script_dir = os.path.dirname(script_path)
-    result = subprocess.run([sys.executable, script_path], capture_output=True, text=True, cwd=script_dir)
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Tree regeneration failed: {result.stderr.strip()}")
+# NUL and line breaks never occur in real paths; refuse them before they reach a predicate
+_CONTROL_RE = re.compile(r"[\x00\r\n]")
 
 
-@router.post("/create-folder")
-async def create_folder(req: CreateFolderRequest):
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def regenerate_tree(db_path: str, table_name: str):
+    # Same process as the API, so the builder's imports are paid once rather than per request
+    from tree_creation import build_tree
+
+    try:
+        build_tree(db_path, table_name, os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tree regeneration failed: {str(e)}")
+
+
+def _create_folder(req: CreateFolderRequest) -> dict:
     try:
         parent_norm = normalize_path(req.parent_path)
         folder_name = (req.name or '').strip()
@@ -55,20 +67,23 @@ async def create_folder(req: CreateFolderRequest):
 
         # Build target folder path
         target_path = f"{parent_norm}|{folder_name}" if parent_norm else folder_name
+        if _CONTROL_RE.search(target_path):
+            raise HTTPException(status_code=400, detail="Path contains invalid characters")
 
         db_path = os.getenv("DB_PATH", DB_PATH_DEFAULT)
         table_name = os.getenv("DB_TABLE", DB_TABLE_DEFAULT)
 
-        db = lancedb.connect(db_path)
-        if table_name not in db.table_names():
+        import pyarrow as pa
+        from clarity_api.db import get_db, get_table
+
+        if table_name not in get_db(db_path).table_names():
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        table = db.open_table(table_name)
-        df = table.to_pandas()
+        table = get_table(db_path, table_name)
 
         # Idempotent behavior: if the folder row already exists, treat as success
-        if (df['Path'] == target_path).any():
-            regenerate_tree()
+        if table.count_rows(f"Path = {sql_string(target_path)}") > 0:
+            regenerate_tree(db_path, table_name)
             return {"success": True, "path": target_path, "existed": True}
 
         # Create folder on filesystem
@@ -80,12 +95,10 @@ async def create_folder(req: CreateFolderRequest):
 
         now = float(time.time())
 
-        # New folder entry (mark as directory via File_type)
+        # New folder entry (mark as directory via File_type); vector columns are left null
         new_row = {
             "Path": target_path,
             "Parent": parent_norm,
-            "Vector": [],
-            "Similarities": [],
             "Name": folder_name,
             "When_Created": now,
             "When_Last_Modified": now,
@@ -93,26 +106,10 @@ async def create_folder(req: CreateFolderRequest):
             "File_type": "folder",
         }
 
-        df = df.copy()
-        # Use concat for forward-compat with pandas
-        import pandas as pd
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        # Append the single row in the table's own schema instead of rewriting the whole table
+        table.add(pa.Table.from_pylist([new_row], schema=table.schema))
 
-        schema = pa.schema([
-            pa.field("Path", pa.string()),
-            pa.field("Parent", pa.string()),
-            pa.field("Vector", pa.list_(pa.float32())),
-            pa.field("Similarities", pa.list_(pa.list_(pa.float32()))),
-            pa.field("Name", pa.string()),
-            pa.field("When_Created", pa.float64()),
-            pa.field("When_Last_Modified", pa.float64()),
-            pa.field("Description", pa.string()),
-            pa.field("File_type", pa.string()),
-        ])
-
-        db.create_table(table_name, schema=schema, data=df.to_dict('records'), mode="overwrite")
-
-        regenerate_tree()
+        regenerate_tree(db_path, table_name)
 
         return {"success": True, "path": target_path, "existed": False}
     except HTTPException:
@@ -121,3 +118,7 @@ async def create_folder(req: CreateFolderRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/create-folder")
+async def create_folder(req: CreateFolderRequest):
+    # LanceDB, filesystem and tree-building calls all block; keep them off the event loop
+    return await asyncio.to_thread(_create_folder, req)
@@ -1,17 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import os
+import re
 import sys
-import subprocess
-import lancedb
-import pandas as pd
 from typing import List
-from dotenv import load_dotenv, find_dotenv
-import shutil
+
+from .clear import fast_rmtree
 
 router = APIRouter()
 
-load_dotenv(find_dotenv())
 
 # Use relative path from the API routes directory
 def get_default_db_path():
@@ -20,6 +18,12 @@ def get_default_db_path():
 
 DB_PATH_DEFAULT = get_default_db_path()
 DB_TABLE_DEFAULT = "Hello"
+OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
+
+# tree_creation.py lives in apps/api/src; the tree is built in-process from there
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "../.."))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 
 class DeleteRequest(BaseModel):
@@ -27,61 +31,64 @@ class DeleteRequest(BaseModel):
     recursive: bool = True  # If True and target is dir, delete all descendants
 
 
+# Runs of path separators (and existing '|' delimiters) collapse to a single '|'
+_SEP_RE = re.compile(r"[\\/|]+")
+
+
 def normalize_path(path: str) -> str:
     if not path:
         return ""
-    s = str(path).replace("\\", "|").replace("/", "|")
-    while "||" in s:
-        s = s.replace("||", "|")
-    return s.strip("|")
+    return _SEP_RE.sub("|", str(path)).strip("|")
+
+
+# NUL and line breaks never occur in real paths; refuse them before they reach a predicate
+_CONTROL_RE = re.compile(r"[\x00\r\n]")
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
 
 
-def regenerate_tree():
+def regenerate_tree(db_path: str, table_name: str):
+    # Same process as the API, so the builder's imports are paid once rather than per request
+    from tree_creation import build_tree
+
     try:
-        routes_dir = os.path.dirname(__file__)
-        script_path = os.path.normpath(os.path.join(routes_dir, "../../tree_creation.py"))
-        script_dir = os.path.dirname(script_path)
-
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
-            text=True,
-            cwd=script_dir,
-        )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr)
+        build_tree(db_path, table_name, os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tree regeneration failed: {str(e)}")
 
 
-@router.post("/delete")
-async def delete_item(req: DeleteRequest):
+def _delete_item(req: DeleteRequest) -> dict:
     try:
         target = normalize_path(req.path)
+        if _CONTROL_RE.search(target):
+            raise HTTPException(status_code=400, detail="Path contains invalid characters")
 
         db_path = os.getenv("DB_PATH", DB_PATH_DEFAULT)
         table_name = os.getenv("DB_TABLE", DB_TABLE_DEFAULT)
 
-        db = lancedb.connect(db_path)
-        if table_name not in db.table_names():
+        from clarity_api.db import get_db, get_table
+
+        if table_name not in get_db(db_path).table_names():
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        table = db.open_table(table_name)
-        df = table.to_pandas()
+        table = get_table(db_path, table_name)
 
-        # Determine deletion set
-        to_delete_mask = (df['Path'] == target)
+        # Determine deletion set as a filter, evaluated by LanceDB without loading the table
+        predicate = f"Path = {sql_string(target)}"
 
-        # If recursive or target appears to be a directory (no extension), delete descendants
-        is_dir_guess = ('.' not in target.split('|')[-1])
+        # If recursive or target appears to be a directory (no extension), delete descendants;
+        # starts_with rather than LIKE so '%' and '_' in names stay literal
+        is_dir_guess = '.' not in target[target.rfind('|') + 1:]
         if req.recursive or is_dir_guess:
-            to_delete_mask |= df['Path'].str.startswith(target + '|')
+            predicate += f" OR starts_with(Path, {sql_string(target + '|')})"
 
-        deleted_count = int(to_delete_mask.sum())
+        deleted_count = table.count_rows(predicate)
         if deleted_count == 0:
             # Also consider items whose Parent is the target (in case of synthetic dir)
-            to_delete_mask |= (df['Parent'] == target)
-            deleted_count = int(to_delete_mask.sum())
+            predicate = f"({predicate}) OR Parent = {sql_string(target)}"
+            deleted_count = table.count_rows(predicate)
 
         if deleted_count == 0:
             raise HTTPException(status_code=404, detail=f"No entries found for path: {target}")
@@ -92,7 +99,7 @@ async def delete_item(req: DeleteRequest):
             if os.path.exists(fs_path):
                 if os.path.isdir(fs_path):
                     if req.recursive:
-                        shutil.rmtree(fs_path)
+                        fast_rmtree(fs_path)
                     else:
                         os.rmdir(fs_path)
                 else:
@@ -100,26 +107,11 @@ async def delete_item(req: DeleteRequest):
         except Exception as fs_err:
             print(f"Filesystem delete warning: {fs_err}")
 
-        # Drop rows and write back
-        remaining = df.loc[~to_delete_mask].copy()
-
-        import pyarrow as pa
-        schema = pa.schema([
-            pa.field("Path", pa.string()),
-            pa.field("Parent", pa.string()),
-            pa.field("Vector", pa.list_(pa.float32())),
-            pa.field("Similarities", pa.list_(pa.list_(pa.float32()))),
-            pa.field("Name", pa.string()),
-            pa.field("When_Created", pa.float64()),
-            pa.field("When_Last_Modified", pa.float64()),
-            pa.field("Description", pa.string()),
-            pa.field("File_type", pa.string()),
-        ])
-
-        db.create_table(table_name, schema=schema, data=remaining.to_dict('records'), mode="overwrite")
+        # Drop only the matching rows; untouched fragments are not rewritten
+        table.delete(predicate)
 
         # Regenerate tree
-        regenerate_tree()
+        regenerate_tree(db_path, table_name)
 
         return {"success": True, "deleted": deleted_count}
     except HTTPException:
@@ -128,3 +120,7 @@ async def delete_item(req: DeleteRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/delete")
+async def delete_item(req: DeleteRequest):
+    # Row matching, file removal and the tree rebuild are all blocking; run them in a worker thread
+    return await asyncio.to_thread(_delete_item, req)
@@ -1,21 +1,29 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import os
 import sys
-import subprocess
-from typing import Optional
-from dotenv import load_dotenv, find_dotenv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 import logging
 import traceback
-import lancedb
-import pandas as pd
 
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Load env for configurable paths
-load_dotenv(find_dotenv())
+
+# Paths and defaults are fixed for the process; only env overrides are read per request
+ROUTES_DIR = os.path.dirname(__file__)
+PROJECT_SRC_DIR = os.path.normpath(os.path.join(ROUTES_DIR, "../../"))
+DB_PATH_DEFAULT = os.path.normpath(os.path.join(ROUTES_DIR, "../../../data/index"))
+DB_TABLE_DEFAULT = "Hello"
+OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
+
+# FileScraper.py and tree_creation.py live in apps/api/src; both run in-process from there
+if PROJECT_SRC_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_SRC_DIR)
 
 
 class IndexRequest(BaseModel):
@@ -25,61 +33,57 @@ class IndexRequest(BaseModel):
     output_path: Optional[str] = None
 
 
-def _run_filescraper_local_scrape(db_path: str, text_table: str, image_table: str, root_dir: str) -> str:
+# One scrape at a time: runs share the process-wide summarizer models
+_scrape_lock = threading.Lock()
+
+
+def _run_filescraper_local_scrape(db_path: str, text_table: str, image_table: str, root_dir: str) -> List[str]:
     """
-    Calls FileScraper.py's LanceDBManager.local_scrape via a subprocess to avoid import side-effects.
-    Expects FileScraper.py to be resolvable relative to this routes module.
+    Runs FileScraper.py's LanceDBManager.local_scrape in this process and returns its per-file
+    progress lines. The embedding models are loaded on the first run and reused by later ones.
     """
-    routes_dir = os.path.dirname(__file__)
-    project_src_dir = os.path.normpath(os.path.join(routes_dir, "../../"))
-    script_path = os.path.normpath(os.path.join(project_src_dir, "FileScraper.py"))
-
-    if not os.path.exists(script_path):
-        raise HTTPException(status_code=500, detail=f"FileScraper.py not found at {script_path}")
-
-    # We execute a small python snippet that imports FileScraper.py and runs local_scrape
-    code = (
-        "import sys, os; "
-        f"sys.path.insert(0, {project_src_dir!r}); "
-        "from FileScraper import LanceDBManager; "
-        f"db=LanceDBManager({db_path!r}); "
-        f"db.local_scrape({text_table!r}, {image_table!r}, {root_dir!r}); "
-    )
-
-    result = subprocess.run(
-        [sys.executable, "-c", code],
-        capture_output=True,
-        text=True,
-        cwd=project_src_dir,
-        env={**os.environ},
-    )
-
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"File scrape failed: {result.stderr.strip()}")
-    return result.stdout or ""
+    # Imported here so app startup doesn't load the scraping stack; a frozen build bundles the
+    # module rather than shipping FileScraper.py, so the import is the availability check
+    try:
+        from FileScraper import LanceDBManager
+    except ImportError as e:
+        raise HTTPException(status_code=500, detail=f"FileScraper could not be imported: {str(e)}")
+
+    logs: List[str] = []
+    try:
+        with _scrape_lock:
+            LanceDBManager(db_path).local_scrape(text_table, image_table, root_dir, progress=logs.append)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"File scrape failed: {str(e)}")
+    return logs
 
 
 def _combine_tables_into_base(db_path: str, base_table: str, text_table: str, image_table: str) -> None:
     """
-    Combine rows from text_table and image_table into base_table (overwrite).
+    Combine rows from text_table and image_table into base_table.
     """
-    db = lancedb.connect(db_path)
-    frames = []
-    if text_table in db.table_names():
-        frames.append(db.open_table(text_table).to_pandas())
-    if image_table in db.table_names():
-        frames.append(db.open_table(image_table).to_pandas())
-    if not frames:
+    import pyarrow as pa
+    from clarity_api.db import get_db, get_table, invalidate
+
+    db = get_db(db_path)
+    existing = db.table_names()
+    names = [name for name in (text_table, image_table) if name in existing]
+
+    # Stay in Arrow: a pandas round-trip turns every Vector/Description cell into a Python object.
+    # Vectors are left out of the read itself, which also avoids FixedSizeList casting issues when
+    # mixing different embedding dims (e.g., 384 vs 512) across tables; the tree builder does not need them.
+    def read(name: str) -> "pa.Table":
+        table = get_table(db_path, name)
+        columns = [col for col in table.schema.names if col != "Vector"]
+        return table.search().select(columns).to_arrow()
+
+    # The two reads are independent and Lance decodes without holding the GIL, so they overlap
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tables = list(pool.map(read, names))
+    if not tables:
         raise HTTPException(status_code=500, detail="No data found to combine into base table")
 
-    combined: pd.DataFrame = pd.concat(frames, ignore_index=True)
-    # Drop high-dimensional vectors to avoid Arrow FixedSizeList casting issues when
-    # mixing different embedding dims (e.g., 384 vs 512) across tables.
-    if "Vector" in combined.columns:
-        try:
-            combined = combined.drop(columns=["Vector"])  # not required for tree builder
-        except Exception:
-            pass
+    combined = pa.concat_tables(tables, promote_options="permissive")
     expected_cols = [
         "Path",
         "Parent",
@@ -89,63 +93,68 @@ def _combine_tables_into_base(db_path: str, base_table: str, text_table: str, im
         "When_Last_Modified",
         "Description",
         "File_type",
+        "Size",
     ]
     for col in expected_cols:
-        if col not in combined.columns:
-            combined[col] = None
+        if col not in combined.column_names:
+            combined = combined.append_column(col, pa.nulls(combined.num_rows))
 
     if base_table in db.table_names():
+        base = get_table(db_path, base_table)
+        if base.schema == combined.schema:
+            # Reconcile in place: only rows whose metadata changed are rewritten, new paths are
+            # inserted and paths no longer scraped are deleted, instead of rewriting every fragment
+            try:
+                (
+                    base.merge_insert("Path")
+                    .when_matched_update_all(where=" OR ".join(
+                        _changed(col) for col in combined.column_names if col not in ("Path", "Vector")
+                    ))
+                    .when_not_matched_insert_all()
+                    .when_not_matched_by_source_delete()
+                    .execute(combined)
+                )
+                return
+            except Exception as e:
+                logger.warning("Merging into '%s' failed, rebuilding it: %s", base_table, e)
         db.drop_table(base_table)
     db.create_table(base_table, data=combined)
+    invalidate()
 
 
-def _run_tree_builder(db_path: str, table_name: str, output_path: str):
-    routes_dir = os.path.dirname(__file__)
-    project_src_dir = os.path.normpath(os.path.join(routes_dir, "../../"))
-    script_path = os.path.normpath(os.path.join(project_src_dir, "tree_creation.py"))
-    script_dir = os.path.dirname(script_path)
+def _changed(col: str) -> str:
+    # Null-safe "differs" for the merge condition (a plain != is never true against NULL)
+    return f"(target.{col} != source.{col} OR (target.{col} IS NULL) != (source.{col} IS NULL))"
 
-    if not os.path.exists(script_path):
-        raise HTTPException(status_code=500, detail=f"tree_creation.py not found at {script_path}")
 
-    result = subprocess.run(
-        [sys.executable, script_path],
-        capture_output=True,
-        text=True,
-        cwd=script_dir,
-        env={
-            **os.environ,
-            "DB_PATH": db_path,
-            "DB_TABLE": table_name,
-            "OUTPUT_PATH": output_path,
-        },
-    )
+def _run_tree_builder(db_path: str, table_name: str, output_path: str) -> dict:
+    """
+    Builds the tree in-process (tree_creation.build_tree) and returns the saved payload.
+    """
+    from tree_creation import build_tree
 
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Tree build failed: {result.stderr.strip()}")
+    try:
+        return build_tree(db_path, table_name, output_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tree build failed: {str(e)}")
 
 
 @router.post("/index")
-async def run_full_index(req: IndexRequest):
+async def run_full_index(req: IndexRequest) -> Dict[str, Any]:
     """
     Run indexing pipeline:
       1) Scrape files into LanceDB (create/overwrite table)
       2) Build tree JSON from LanceDB and return the payload
 
     Body overrides are optional; environment defaults are used otherwise.
+    The return annotation lets FastAPI serialize the (large) tree straight to JSON bytes in
+    pydantic-core instead of walking it with jsonable_encoder and the stdlib json module.
     """
     try:
         # Defaults aligned with tree_creation.py and refresh.py
-        if req.db_path:
-            db_path = req.db_path
-        else:
-            # Use relative path from the API routes directory
-            routes_dir = os.path.dirname(__file__)
-            # Go up to api/src, then down to data
-            default_db_path = os.path.normpath(os.path.join(routes_dir, "../../../data/index"))
-            db_path = os.getenv("DB_PATH", default_db_path)
-        base_table = req.table_name or os.getenv("DB_TABLE", "Hello")
-        output_path = req.output_path or os.getenv("OUTPUT_PATH", "../data/file_tree.json")
+        db_path = req.db_path or os.getenv("DB_PATH", DB_PATH_DEFAULT)
+        base_table = req.table_name or os.getenv("DB_TABLE", DB_TABLE_DEFAULT)
+        output_path = req.output_path or os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT)
 
         # Pick a reasonable default for root_dir if none provided
         root_dir = req.root_dir or os.getenv("INDEX_ROOT", os.path.expanduser("~"))
@@ -153,33 +162,20 @@ async def run_full_index(req: IndexRequest):
         # 1) Scrape content into LanceDB -> text and image tables
         text_table = f"{base_table}_text"
         image_table = f"{base_table}_image"
-        stdout = _run_filescraper_local_scrape(db_path, text_table, image_table, root_dir)
+        # Every step blocks for a long time, so each runs in a worker thread and the event loop
+        # stays free for other requests while an index is in progress
+        scrape_logs = await asyncio.to_thread(
+            _run_filescraper_local_scrape, db_path, text_table, image_table, root_dir
+        )
 
         # 1b) Combine into base table for tree builder consumption
-        _combine_tables_into_base(db_path, base_table, text_table, image_table)
-
-        # 2) Build tree JSON and return
-        _run_tree_builder(db_path, base_table, output_path)
-
-        # After successful build, read JSON and return
-        project_src_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "../../"))
-        output_abs = os.path.normpath(os.path.join(project_src_dir, output_path))
-        if not os.path.exists(output_abs):
-            raise HTTPException(status_code=500, detail=f"Tree output not found at {output_abs}")
-
-        with open(output_abs, "r", encoding="utf-8") as f:
-            import json
-            tree = json.load(f)
-
-        # Attach a lightweight log extract of processed files
-        log_lines = []
-        for line in (stdout or "").splitlines():
-            # Capture lines indicating a file was processed
-            if "Inserted data for" in line or "Processing" in line:
-                log_lines.append(line.strip())
-            # Keep size reasonable
-            if len(log_lines) >= 200:
-                break
+        await asyncio.to_thread(_combine_tables_into_base, db_path, base_table, text_table, image_table)
+
+        # 2) Build tree JSON and return the payload it saved
+        tree = await asyncio.to_thread(_run_tree_builder, db_path, base_table, output_path)
+
+        # Attach a lightweight log extract of processed files (keep size reasonable)
+        log_lines = scrape_logs[:200]
 
         # Non-invasive: include logs at top-level without changing required schema fields
         if isinstance(tree, dict):
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+import asyncio
+import os
+import logging
+from typing import Any, Dict, Optional
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+ROUTES_DIR = os.path.dirname(__file__)
+DB_PATH_DEFAULT = os.path.normpath(os.path.join(ROUTES_DIR, "../../../data/index"))
+DB_TABLE_DEFAULT = "Hello"
+
+
+class OptimizeRequest(BaseModel):
+    db_path: Optional[str] = None
+    table_name: Optional[str] = None  # base table name; its _text and _image tables are included
+
+
+def optimize_tables(db_path: str, base_table: str) -> Dict[str, Any]:
+    """
+    Compacts the base, text and image tables and folds rows added since the last index build
+    into their vector index (table.optimize()). Renames, deletes and small scrapes each leave a
+    fragment or deletion file behind, and searches scan unindexed rows brute force on top of the index.
+    """
+    from clarity_api.db import get_db, get_table
+
+    existing = get_db(db_path).table_names()
+    report: Dict[str, Any] = {}
+    for name in (base_table, f"{base_table}_text", f"{base_table}_image"):
+        if name not in existing:
+            continue
+        table = get_table(db_path, name)
+        try:
+            before = table.stats()["fragment_stats"]["num_fragments"]
+            table.optimize()
+            report[name] = {
+                "fragments_before": before,
+                "fragments_after": table.stats()["fragment_stats"]["num_fragments"],
+            }
+        except Exception as e:
+            logger.warning("Optimizing '%s' failed: %s", name, e)
+            report[name] = {"error": str(e)}
+    return report
+
+
+async def optimize_periodically(interval: float) -> None:
+    """Runs optimize_tables on the env-configured tables every interval seconds (see app.py)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(
+                optimize_tables,
+                os.getenv("DB_PATH", DB_PATH_DEFAULT),
+                os.getenv("DB_TABLE", DB_TABLE_DEFAULT),
+            )
+        except Exception as e:
+            logger.warning("Scheduled optimize failed: %s", e)
+
+
+@router.post("/admin/optimize")
+async def optimize(req: OptimizeRequest):
+    """
+    Compacts the tables and refreshes their vector indexes now.
+    """
+    db_path = req.db_path or os.getenv("DB_PATH", DB_PATH_DEFAULT)
+    base_table = req.table_name or os.getenv("DB_TABLE", DB_TABLE_DEFAULT)
+    try:
+        tables = await asyncio.to_thread(optimize_tables, db_path, base_table)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Optimize failed: {str(e)}")
+    return {"tables": tables}
@@ -1,14 +1,11 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+import asyncio
 import os
 import sys
-import json
-import subprocess
-from dotenv import load_dotenv, find_dotenv
 
 router = APIRouter()
 
-# Load environment variables
-load_dotenv(find_dotenv())
 
 # Use relative path from the API routes directory
 def get_default_db_path():
@@ -20,55 +17,41 @@ DB_PATH_DEFAULT = get_default_db_path()
 DB_TABLE_DEFAULT = "Hello"
 OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
 
+# tree_creation.py lives in apps/api/src; the tree is built in-process from there
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "../.."))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
-def _build_tree_and_read_output():
+
+def _build_tree_and_read_output() -> str:
     """
-    Runs the tree builder script and returns the parsed JSON payload.
+    Runs the tree builder in-process and returns the path of the JSON file it saved.
     """
-    # Resolve tree_creation.py path
-    routes_dir = os.path.dirname(__file__)
-    script_path = os.path.normpath(os.path.join(routes_dir, "../../tree_creation.py"))
-    script_dir = os.path.dirname(script_path)
-
-    # Execute the script with current Python
-    result = subprocess.run(
-        [sys.executable, script_path],
-        capture_output=True,
-        text=True,
-        cwd=script_dir,
-        env={
-            **os.environ,
-            "DB_PATH": os.getenv("DB_PATH", DB_PATH_DEFAULT),
-            "DB_TABLE": os.getenv("DB_TABLE", DB_TABLE_DEFAULT),
-            "OUTPUT_PATH": os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT),
-        },
-    )
-
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Tree build failed: {result.stderr.strip()}")
-
-    # Locate the output file and return its JSON
-    output_path_env = os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT)
-    output_abs = os.path.normpath(os.path.join(script_dir, output_path_env))
+    from tree_creation import build_tree, resolve_output_path
 
-    if not os.path.exists(output_abs):
-        raise HTTPException(status_code=500, detail=f"Tree output not found at {output_abs}")
-
-    with open(output_abs, "r", encoding="utf-8") as f:
-        return json.load(f)
+    output_path = os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT)
+    try:
+        build_tree(
+            os.getenv("DB_PATH", DB_PATH_DEFAULT),
+            os.getenv("DB_TABLE", DB_TABLE_DEFAULT),
+            output_path,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tree build failed: {str(e)}")
+    return resolve_output_path(output_path)
 
 
 @router.post("/refresh")
 async def refresh_tree():
     """
     Rebuilds the tree JSON from LanceDB and returns the updated payload.
+    The payload is the file the builder just saved, streamed as is rather than encoded again.
     """
     try:
-        payload = _build_tree_and_read_output()
-        return payload
+        # The build reads the whole table; run it in a worker thread so other requests keep flowing
+        output_abs = await asyncio.to_thread(_build_tree_and_read_output)
+        return FileResponse(output_abs, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-
-
@@ -1,17 +1,17 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-import lancedb
-import pandas as pd
+import asyncio
 import os
+import re
+import sys
 import json
+import threading
+import time
 from typing import Optional, List
-from dotenv import load_dotenv, find_dotenv
 import shutil
 
 router = APIRouter()
 
-# Load environment configuration
-load_dotenv(find_dotenv())
 
 # Use relative path from the API routes directory
 def get_default_db_path():
@@ -21,6 +21,12 @@ def get_default_db_path():
 # Defaults if not set in environment
 DB_PATH_DEFAULT = get_default_db_path()
 DB_TABLE_DEFAULT = "Hello"
+OUTPUT_PATH_DEFAULT = "../data/file_tree.json"
+
+# tree_creation.py lives in apps/api/src; the tree is built in-process from there
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "../.."))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 class RenameRequest(BaseModel):
     old_path: str  # Path with | delimiters (e.g., "C:|Professional|oldname.pdf")
@@ -33,17 +39,24 @@ class RenameResponse(BaseModel):
     new_path: str
     updated_entries: int
 
+# Runs of path separators (and existing '|' delimiters) collapse to a single '|'
+_SEP_RE = re.compile(r"[\\/|]+")
+
+
 def normalize_path(path):
     """
     Normalize paths by replacing both forward and backward slashes with | delimiter.
     """
     if not path:
         return ""
-    
-    normalized = str(path).replace("\\", "|").replace("/", "|")
-    while "||" in normalized:
-        normalized = normalized.replace("||", "|")
-    return normalized.strip("|")
+    return _SEP_RE.sub("|", str(path)).strip("|")
+
+# NUL and line breaks never occur in real paths; refuse them before they reach a predicate
+_CONTROL_RE = re.compile(r"[\x00\r\n]")
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
 
 def get_parent_path(path: str) -> str:
     """Get parent path from normalized path."""
@@ -57,35 +70,65 @@ def get_filename_from_path(path: str) -> str:
     parts = path.split("|")
     return parts[-1] if parts else ""
 
-def regenerate_tree():
+def regenerate_tree(db_path: str, table_name: str):
     """Regenerate the tree structure after database changes."""
     try:
-        # Import and run the tree generation
-        import sys
-        import subprocess
-        
-        # Correct path to tree builder script relative to this file
-        # routes/ -> ../.. leads to apps/api/src where tree_creation.py resides
-        tree_script_path = os.path.join(os.path.dirname(__file__), "../../tree_creation.py")
-        
-        # Run tree.py to regenerate the tree structure
-        result = subprocess.run([sys.executable, tree_script_path], 
-                              capture_output=True, text=True, cwd=os.path.dirname(tree_script_path))
-        
-        if result.returncode == 0:
-            print("Tree regenerated successfully")
-            return True
-        else:
-            print(f"Tree regeneration failed: {result.stderr}")
-            return False
+        # Built in the API process, so the builder's imports are paid once rather than per rename
+        from tree_creation import build_tree
+
+        build_tree(db_path, table_name, os.getenv("OUTPUT_PATH", OUTPUT_PATH_DEFAULT))
+        print("Tree regenerated successfully")
+        return True
     except Exception as e:
         print(f"Error regenerating tree: {e}")
         return False
 
-@router.post("/rename", response_model=RenameResponse)
-async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks):
+# A burst of renames (e.g. a batch from the UI) rebuilds the tree once: each rename bumps its
+# table's generation, and only the task that is still the latest after the delay builds
+_TREE_DEBOUNCE_S = 0.5
+_tree_generations: dict = {}
+_tree_generations_lock = threading.Lock()
+_tree_build_lock = threading.Lock()
+
+
+def _next_tree_generation(db_path: str, table_name: str) -> int:
+    with _tree_generations_lock:
+        generation = _tree_generations.get((db_path, table_name), 0) + 1
+        _tree_generations[(db_path, table_name)] = generation
+        return generation
+
+
+def regenerate_tree_debounced(generation: int, db_path: str, table_name: str):
+    """Regenerate the tree unless a later rename of the same table has been scheduled since."""
+    time.sleep(_TREE_DEBOUNCE_S)
+    with _tree_generations_lock:
+        if _tree_generations.get((db_path, table_name)) != generation:
+            return False
+    with _tree_build_lock:
+        return regenerate_tree(db_path, table_name)
+
+def _fs_rename(old: str, new: str) -> None:
+    """
+    Moves old to new if old exists. os.replace doubles as the existence check; the parent
+    directory is only created (and the move retried) when that is what was missing.
+    """
+    try:
+        os.replace(old, new)
+    except FileNotFoundError:
+        parent = os.path.dirname(new)
+        if not parent or not os.path.lexists(old):
+            return
+        os.makedirs(parent, exist_ok=True)
+        os.replace(old, new)
+
+
+def _rename_item(request: RenameRequest, background_tasks: BackgroundTasks) -> RenameResponse:
     
     try:
+        # The new path is the old path's parent plus new_name, so checking both covers it
+        if _CONTROL_RE.search(request.old_path) or _CONTROL_RE.search(request.new_name):
+            raise HTTPException(status_code=400, detail="Path contains invalid characters")
+
         # Normalize the old path
         old_path_normalized = normalize_path(request.old_path)
         parent_path = get_parent_path(old_path_normalized)
@@ -94,13 +137,14 @@ async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks)
         db_path = os.getenv("DB_PATH", DB_PATH_DEFAULT)
         table_name = os.getenv("DB_TABLE", DB_TABLE_DEFAULT)
         
+        from clarity_api.db import get_db, get_table
+
         try:
-            db = lancedb.connect(db_path)
+            db = get_db(db_path)
             if table_name not in db.table_names():
                 raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
             
-            table = db.open_table(table_name)
-            df = table.to_pandas()
+            table = get_table(db_path, table_name)
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
@@ -108,20 +152,23 @@ async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks)
         # Track updates
         updated_entries = 0
         
-        # Find main item. If it doesn't exist, we may still process as a directory pivot (synthetic folder)
-        main_item_mask = df['Path'] == old_path_normalized
-        main_items = df[main_item_mask]
+        # Find main item. If it doesn't exist, we may still process as a directory pivot (synthetic folder).
+        # Only the two fields needed to classify it are read, not the table
+        main_where = f"Path = {sql_string(old_path_normalized)}"
+        main_items = (
+            table.search().where(main_where).select(["Name", "File_type"]).limit(1).to_list()
+        )
 
         treat_as_directory = False
-        if main_items.empty:
+        if not main_items:
             # No explicit row for this path – treat it as a directory path pivot and update all descendants
             treat_as_directory = True
             orig_name = get_filename_from_path(old_path_normalized)
             was_directory = True
         else:
             # Preserve original file extension for files when new_name omits it
-            orig_name = str(main_items.iloc[0]['Name'])
-            file_type_value = str(main_items.iloc[0].get('File_type', '')).lower()
+            orig_name = str(main_items[0]['Name'] or '')
+            file_type_value = str(main_items[0]['File_type'] or '').lower()
             was_directory = file_type_value in {'folder', 'dir', 'directory'} or ('.' not in orig_name)
 
         safe_new_name = request.new_name
@@ -142,71 +189,52 @@ async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks)
         try:
             old_fs = old_path_normalized.replace('|', os.sep)
             new_fs = new_path_normalized.replace('|', os.sep)
-            old_fs_abs = old_fs
-            new_fs_abs = new_fs
-            if os.path.exists(old_fs_abs):
-                os.makedirs(os.path.dirname(new_fs_abs), exist_ok=True) if os.path.dirname(new_fs_abs) else None
-                os.replace(old_fs_abs, new_fs_abs)
+            _fs_rename(old_fs, new_fs)
         except Exception as fs_err:
             # Do not fail the whole request on FS error; continue to DB update
             print(f"Filesystem rename warning: {fs_err}")
 
-        # Update the main item if it exists
-        if not main_items.empty:
-            df.loc[main_item_mask, 'Path'] = new_path_normalized
-            df.loc[main_item_mask, 'Name'] = safe_new_name
-            updated_entries += len(main_items)
-
-        # If it's a directory (or synthetic directory), update all children
-        if was_directory or treat_as_directory:
-            # Update all items where Parent starts with the old path
-            children_mask = df['Parent'] == old_path_normalized
-            df.loc[children_mask, 'Parent'] = new_path_normalized
-            updated_entries += children_mask.sum()
-            
-            # Update all items where Path starts with old_path (subdirectories and files)
-            for index, row in df.iterrows():
-                current_path = str(row['Path'])
-                if current_path.startswith(old_path_normalized + "|"):
-                    # Replace the old path prefix with new path
-                    new_child_path = current_path.replace(old_path_normalized + "|", new_path_normalized + "|", 1)
-                    df.at[index, 'Path'] = new_child_path
-                    updated_entries += 1
-                
-                # Also update Parent paths for deeper nesting
-                current_parent = str(row['Parent'])
-                if current_parent.startswith(old_path_normalized + "|"):
-                    new_parent_path = current_parent.replace(old_path_normalized + "|", new_path_normalized + "|", 1)
-                    df.at[index, 'Parent'] = new_parent_path
-        
-        # Save updated data back to LanceDB
+        # Patch only the affected rows in place instead of rewriting the whole table
         try:
-            # Convert back to records for LanceDB
-            updated_data = df.to_dict('records')
-            
-            # Create new table with same schema
-            import pyarrow as pa
-            schema = pa.schema([
-                pa.field("Path", pa.string()),
-                pa.field("Parent", pa.string()),
-                pa.field("Vector", pa.list_(pa.float32())),
-                pa.field("Similarities", pa.list_(pa.list_(pa.float32()))),
-                pa.field("Name", pa.string()),
-                pa.field("When_Created", pa.float64()),
-                pa.field("When_Last_Modified", pa.float64()),
-                pa.field("Description", pa.string()),
-                pa.field("File_type", pa.string()),
-            ])
-            
-            # Overwrite the table atomically
-            db.create_table(table_name, schema=schema, data=updated_data, mode="overwrite")
+            # Update the main item if it exists
+            if main_items:
+                updated_entries += table.update(
+                    where=main_where, values={"Path": new_path_normalized, "Name": safe_new_name}
+                ).rows_updated
+
+            # If it's a directory (or synthetic directory), update all children
+            if was_directory or treat_as_directory:
+                # Update all items whose Parent is the old path
+                updated_entries += table.update(
+                    where=f"Parent = {sql_string(old_path_normalized)}",
+                    values={"Parent": new_path_normalized},
+                ).rows_updated
+
+                # Update all items where Path starts with old_path (subdirectories and files) by
+                # swapping the old prefix for the new one; starts_with keeps '%' and '_' literal
+                old_prefix = old_path_normalized + "|"
+                new_prefix = sql_string(new_path_normalized + "|")
+                rest = len(old_prefix) + 1
+                updated_entries += table.update(
+                    where=f"starts_with(Path, {sql_string(old_prefix)})",
+                    values_sql={"Path": f"concat({new_prefix}, substr(Path, {rest}))"},
+                ).rows_updated
+
+                # Also update Parent paths for deeper nesting
+                table.update(
+                    where=f"starts_with(Parent, {sql_string(old_prefix)})",
+                    values_sql={"Parent": f"concat({new_prefix}, substr(Parent, {rest}))"},
+                )
+
             print(f"Updated {updated_entries} entries in database")
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to update database: {str(e)}")
         
-        # Regenerate tree structure in background
-        background_tasks.add_task(regenerate_tree)
+        # Regenerate tree structure in background, coalesced with any renames right behind this one
+        background_tasks.add_task(
+            regenerate_tree_debounced, _next_tree_generation(db_path, table_name), db_path, table_name
+        )
         
         return RenameResponse(
             success=True,
@@ -221,20 +249,29 @@ async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rename operation failed: {str(e)}")
 
+@router.post("/rename", response_model=RenameResponse)
+async def rename_item(request: RenameRequest, background_tasks: BackgroundTasks):
+    # The table read/rewrite and the filesystem rename block; do them in a worker thread
+    return await asyncio.to_thread(_rename_item, request, background_tasks)
+
 @router.get("/rename/check")
 async def check_rename_availability():
     """
     Check if rename functionality is available (database accessible, etc.)
     """
+    # Opening the database and counting rows are blocking LanceDB calls
+    return await asyncio.to_thread(_check_rename_availability)
+
+def _check_rename_availability() -> dict:
     try:
         db_path = get_default_db_path()
         table_name = "Hello"
         
-        db = lancedb.connect(db_path)
-        if table_name not in db.table_names():
+        from clarity_api.db import get_db, get_table
+        if table_name not in get_db(db_path).table_names():
             return {"available": False, "reason": f"Table '{table_name}' not found"}
         
-        table = db.open_table(table_name)
+        table = get_table(db_path, table_name)
         count = len(table)
         
         return {
@@ -1,50 +1,86 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import asyncio
 import os
 import sys
-import json
 from typing import List, Dict, Any
 
 # Add the project src directory to the path
 routes_dir = os.path.dirname(__file__)
 project_src_dir = os.path.normpath(os.path.join(routes_dir, "../../"))
 sys.path.insert(0, project_src_dir)
+DB_PATH_DEFAULT = os.path.normpath(os.path.join(routes_dir, "../../../data/index"))
+# Base table name shared with index.py/refresh.py; searches read its _text table
+DB_TABLE_DEFAULT = "Hello"
+TREE_CANDIDATES = [
+    os.path.normpath(os.path.join(routes_dir, "../../../data/file_tree.json")),
+    os.path.normpath(os.path.join(routes_dir, "../../../../data/file_tree.json")),
+]
 
-from clarity_api.search.text_search import TextSearcher
 
 router = APIRouter()
 
-def get_tree_data():
-    """Load the current tree structure to validate search results"""
+def get_tree_nodes() -> Dict[str, Dict[str, Any]]:
+    """Tree nodes keyed by path_abs, used to validate and enrich search results"""
+    from clarity_api.routes.tree import tree_nodes_by_path
+
     try:
         # Use the same logic as tree.py to find the tree file
-        tree_candidates = [
-            os.path.normpath(os.path.join(routes_dir, "../../../data/file_tree.json")),
-            os.path.normpath(os.path.join(routes_dir, "../../../../data/file_tree.json"))
-        ]
-        
-        for tree_path in tree_candidates:
+        for tree_path in TREE_CANDIDATES:
             if os.path.exists(tree_path):
-                with open(tree_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        return None
+                return tree_nodes_by_path(tree_path)
+        return {}
     except Exception:
-        return None
+        return {}
 
 def normalize_path_for_comparison(path: str) -> str:
     """Normalize path for comparison with tree data"""
     return path.replace("\\", "|").replace("/", "|")
 
+def _result_item(best_match_path: str, score: float, nodes_by_path: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Result entry for a match, enriched with its tree metadata when the file is in the tree"""
+    normalized_path = normalize_path_for_comparison(best_match_path)
+    result_item = {
+        "path": best_match_path,
+        "normalized_path": normalized_path,
+        "score": score,  # cosine similarity to the query
+        "type": "text"
+    }
+
+    # Add tree metadata if found
+    file_info = nodes_by_path.get(normalized_path)
+    if file_info:
+        result_item.update({
+            "name": file_info.get("name", ""),
+            "size_bytes": file_info.get("size_bytes"),
+            "ext": file_info.get("ext", ""),
+            "is_dir": file_info.get("is_dir", 0),
+            "in_tree": True
+        })
+    else:
+        result_item["in_tree"] = False
+    return result_item
+
 class TextSearchRequest(BaseModel):
     query: str
     db_path: str = None
-    table_name: str = "text"  # Default table name
+    table_name: str = None  # Defaults to the text table written by /index
+    top_k: int = Field(1, ge=1, le=100)  # matches returned per query, best first
 
 class TextSearchResponse(BaseModel):
     query: str
     results: List[Dict[str, Any]]
     total_results: int
 
+class TextSearchBatchRequest(BaseModel):
+    queries: List[str]
+    db_path: str = None
+    table_name: str = None  # Defaults to the text table written by /index
+    top_k: int = Field(1, ge=1, le=100)  # matches returned per query, best first
+
+class TextSearchBatchResponse(BaseModel):
+    results: List[TextSearchResponse]  # one entry per query, in request order
+
 @router.post("/search-text", response_model=TextSearchResponse)
 async def search_text(req: TextSearchRequest):
     """
@@ -52,22 +88,15 @@ async def search_text(req: TextSearchRequest):
     """
     try:
         # Use provided db_path or default to relative path
-        if req.db_path:
-            db_path = req.db_path
-        else:
-            # Use relative path from the API routes directory
-            routes_dir = os.path.dirname(__file__)
-            # Go up to api/src, then down to data
-            default_db_path = os.path.normpath(os.path.join(routes_dir, "../../../data/index"))
-            db_path = os.getenv("DB_PATH", default_db_path)
+        db_path = req.db_path or os.getenv("DB_PATH", DB_PATH_DEFAULT)
+        table_name = req.table_name or f"{os.getenv('DB_TABLE', DB_TABLE_DEFAULT)}_text"
         
         # Check if database exists and has the required table
-        import lancedb
+        from clarity_api.db import get_db
         try:
-            db = lancedb.connect(db_path)
-            available_tables = db.table_names()
+            available_tables = await asyncio.to_thread(lambda: get_db(db_path).table_names())
             
-            if req.table_name not in available_tables:
+            if table_name not in available_tables:
                 # Return empty results if table doesn't exist
                 return TextSearchResponse(
                     query=req.query,
@@ -84,46 +113,21 @@ async def search_text(req: TextSearchRequest):
             )
         
         # Initialize searcher
-        searcher = TextSearcher(db_path, req.table_name)
+        # Imported here so app startup doesn't load the embedding stack
+        from clarity_api.search.text_search import TextSearcher
+        # The first searcher loads the embedding models, which takes seconds; not on the event loop
+        searcher = await asyncio.to_thread(TextSearcher, db_path, table_name)
         
-        # Perform search
-        best_match_path = searcher.search(req.query)
+        # Perform search; embedding the query and scanning vectors is CPU/IO bound, so it runs
+        # in a worker thread instead of stalling the event loop
+        matches = await asyncio.to_thread(searcher.search_top, req.query, req.top_k)
         
         # Load tree data to validate and enrich results
-        tree_data = get_tree_data()
+        nodes_by_path = await asyncio.to_thread(get_tree_nodes)
         results = []
         
-        if best_match_path:
-            normalized_path = normalize_path_for_comparison(best_match_path)
-            
-            # Try to find the file in the tree structure
-            file_info = None
-            if tree_data and "nodes" in tree_data:
-                for node_id, node in tree_data["nodes"].items():
-                    if node.get("path_abs") == normalized_path:
-                        file_info = node
-                        break
-            
-            result_item = {
-                "path": best_match_path,
-                "normalized_path": normalized_path,
-                "score": 1.0,  # You can calculate actual similarity score
-                "type": "text"
-            }
-            
-            # Add tree metadata if found
-            if file_info:
-                result_item.update({
-                    "name": file_info.get("name", ""),
-                    "size_bytes": file_info.get("size_bytes"),
-                    "ext": file_info.get("ext", ""),
-                    "is_dir": file_info.get("is_dir", 0),
-                    "in_tree": True
-                })
-            else:
-                result_item["in_tree"] = False
-                
-            results.append(result_item)
+        for path, score in matches:
+            results.append(_result_item(path, score, nodes_by_path))
         
         return TextSearchResponse(
             query=req.query,
@@ -133,3 +137,50 @@ async def search_text(req: TextSearchRequest):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text search failed: {str(e)}")
+
+@router.post("/search-text/batch", response_model=TextSearchBatchResponse)
+async def search_text_batch(req: TextSearchBatchRequest):
+    """
+    Search several queries at once: they are embedded together and answered by one LanceDB
+    multi-vector query, instead of one model pass and one search per request.
+    """
+    empty = TextSearchBatchResponse(
+        results=[TextSearchResponse(query=query, results=[], total_results=0) for query in req.queries]
+    )
+    if not req.queries:
+        return empty
+    try:
+        db_path = req.db_path or os.getenv("DB_PATH", DB_PATH_DEFAULT)
+        table_name = req.table_name or f"{os.getenv('DB_TABLE', DB_TABLE_DEFAULT)}_text"
+
+        from clarity_api.db import get_db
+        try:
+            available_tables = await asyncio.to_thread(lambda: get_db(db_path).table_names())
+        except Exception:
+            return empty
+        if table_name not in available_tables:
+            return empty
+
+        from clarity_api.search.text_search import TextSearcher
+        searcher = await asyncio.to_thread(TextSearcher, db_path, table_name)
+        matches_per_query = await asyncio.to_thread(searcher.search_many, req.queries, req.top_k)
+
+        nodes_by_path = await asyncio.to_thread(get_tree_nodes)
+        responses = []
+        for query, matches in zip(req.queries, matches_per_query):
+            results = [_result_item(path, score, nodes_by_path) for path, score in matches]
+            responses.append(TextSearchResponse(query=query, results=results, total_results=len(results)))
+        return TextSearchBatchResponse(results=responses)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Text batch search failed: {str(e)}")
+
+
+@router.get("/search/cache-stats")
+async def search_cache_stats():
+    """
+    Hit/miss counters and sizes of the text and image search result caches.
+    """
+    from clarity_api.search.query_cache import image_results, text_results
+
+    return {"text": text_results.stats(), "image": image_results.stats()}
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
+import asyncio
+import gzip
 import json
 import os
+import threading
 from typing import Dict, List, Any, Optional
-from dotenv import load_dotenv, find_dotenv
 
 router = APIRouter()
 
-# Load env for dynamic OUTPUT_PATH if provided
-load_dotenv(find_dotenv())
 
 class TreeNodeResponse(BaseModel):
     id: str
@@ -28,6 +29,11 @@ class TreeDataResponse(BaseModel):
     root_ids: List[str]
     metadata: Dict[str, int]
 
+ROUTES_DIR = os.path.dirname(__file__)
+# repo root from routes: ../../../.. (to apps) then .. (to root)
+REPO_ROOT = os.path.abspath(os.path.join(ROUTES_DIR, "../../../../.."))
+LEGACY_TREE_PATH = os.path.normpath(os.path.join(ROUTES_DIR, "../../../data/file_tree.json"))
+
 def resolve_tree_data_path() -> str:
     """
     Resolve the most likely file_tree.json location by trying:
@@ -37,30 +43,75 @@ def resolve_tree_data_path() -> str:
       4) repo_root/data/file_tree.json
     Returns the first path that exists, otherwise the legacy default.
     """
-    routes_dir = os.path.dirname(__file__)
-    # repo root from routes: ../../../.. (to apps) then .. (to root)
-    repo_root = os.path.abspath(os.path.join(routes_dir, "../../../../.."))
-
     env_output = os.getenv("OUTPUT_PATH")
     candidates: List[str] = []
     if env_output:
         if os.path.isabs(env_output):
             candidates.append(env_output)
         else:
-            candidates.append(os.path.normpath(os.path.join(repo_root, env_output)))
+            candidates.append(os.path.normpath(os.path.join(REPO_ROOT, env_output)))
 
-    legacy_default = os.path.normpath(os.path.join(routes_dir, "../../../data/file_tree.json"))
-    candidates.append(legacy_default)
-    candidates.append(os.path.join(repo_root, "data", "file_tree.json"))
+    candidates.append(LEGACY_TREE_PATH)
+    candidates.append(os.path.join(REPO_ROOT, "data", "file_tree.json"))
 
     for p in candidates:
         if os.path.exists(p):
             return p
     # Fallback to legacy default
-    return legacy_default
+    return LEGACY_TREE_PATH
+
+# orjson parses multi-MB trees noticeably faster when installed; the stdlib parser is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _read_tree_file(tree_path: str) -> Dict[str, Any]:
+    with open(tree_path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+# Gzipped copy of the last tree file served, keyed by its stat; the file only changes on a rebuild
+_gzip_cache: Dict[str, Any] = {"key": None, "body": None}
+_gzip_lock = threading.Lock()
+
+def _gzipped_tree_file(tree_path: str) -> bytes:
+    stat = os.stat(tree_path)
+    key = (tree_path, stat.st_mtime_ns, stat.st_size)
+    with _gzip_lock:
+        if _gzip_cache["key"] == key:
+            return _gzip_cache["body"]
+    with open(tree_path, 'rb') as f:
+        body = gzip.compress(f.read(), compresslevel=6)
+    with _gzip_lock:
+        _gzip_cache["key"], _gzip_cache["body"] = key, body
+    return body
+
+# Nodes of the last tree file parsed for search, keyed by path_abs; reparsed only after a rebuild
+_nodes_cache: Dict[str, Any] = {"key": None, "nodes": None}
+_nodes_lock = threading.Lock()
+
+def tree_nodes_by_path(tree_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Tree nodes keyed by path_abs. The parse is cached against the file's stat, so searches
+    look results up in O(1) without re-reading the tree on every request.
+    """
+    stat = os.stat(tree_path)
+    key = (tree_path, stat.st_mtime_ns, stat.st_size)
+    with _nodes_lock:
+        if _nodes_cache["key"] == key:
+            return _nodes_cache["nodes"]
+    nodes = _read_tree_file(tree_path).get("nodes") or {}
+    by_path: Dict[str, Dict[str, Any]] = {}
+    for node in nodes.values():
+        # First node wins, as the linear scan it replaces returned the first match
+        by_path.setdefault(node.get("path_abs"), node)
+    with _nodes_lock:
+        _nodes_cache["key"], _nodes_cache["nodes"] = key, by_path
+    return by_path
 
 @router.get("/tree", response_model=TreeDataResponse)
-async def get_tree_structure():
+async def get_tree_structure(request: Request):
     """
     Get the complete file tree structure from the generated tree data.
     This endpoint serves the tree structure created by the tree.py script.
@@ -74,17 +125,20 @@ async def get_tree_structure():
                 detail=f"Tree data not found. Please run the tree generation script first. Looking for: {tree_path}"
             )
         
-        # Load and return the tree data
-        with open(tree_path, 'r', encoding='utf-8') as f:
-            tree_data = json.load(f)
-        
-        return tree_data
-        
-    except json.JSONDecodeError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Invalid JSON in tree data file: {str(e)}"
+        # The builder already wrote this exact payload as JSON; stream the file in chunks instead of
+        # parsing, validating and re-encoding every node (which holds the whole tree in memory
+        # several times over before the first byte goes out)
+        if "gzip" not in request.headers.get("accept-encoding", ""):
+            return FileResponse(tree_path, media_type="application/json")
+
+        # Tree JSON compresses several times over; compressed once per rebuild, not per request
+        body = await asyncio.to_thread(_gzipped_tree_file, tree_path)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
         )
+        
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -101,8 +155,7 @@ async def get_tree_stats():
         if not os.path.exists(tree_path):
             raise HTTPException(status_code=404, detail="Tree data not found")
         
-        with open(tree_path, 'r', encoding='utf-8') as f:
-            tree_data = json.load(f)
+        tree_data = await asyncio.to_thread(_read_tree_file, tree_path)
         
         # Return just the metadata
         return {
@@ -1,78 +1,116 @@
 import numpy as np
-import lancedb
-from sklearn.metrics.pairwise import cosine_similarity
 import sys
 import os
+from typing import List, Tuple
 
 # Add the project src directory to the path
 current_dir = os.path.dirname(__file__)
 project_src_dir = os.path.normpath(os.path.join(current_dir, "../../"))
 sys.path.insert(0, project_src_dir)
 
-from clarity_api.indexing.image_embed import ImageEmbedder 
+from clarity_api.db import ensure_vector_index, get_db, get_table
+from clarity_api.indexing.image_embed import get_image_embedder
+from clarity_api.search.query_cache import image_results
 
 class ImageSearcher:
     def __init__(self, db_path: str, table_name: str = "images"):
-        self.db = lancedb.connect(db_path)
+        # Connection and table handles are shared across requests (see clarity_api.db)
+        self.db = get_db(db_path)
         if table_name not in self.db.table_names():
             raise ValueError(f"Table '{table_name}' not found in LanceDB.")
-        self.table = self.db.open_table(table_name)
-        self.embedder = ImageEmbedder()
+        self.table = get_table(db_path, table_name)
+        self._cache_scope = (db_path, table_name)
+        # Searches go through the ANN index; legacy tables get one on first use
+        ensure_vector_index(db_path, table_name)
+        # Loaded on the first search and reused by every later one (and by indexing)
+        self.embedder = get_image_embedder()
 
     def search(self, query: str) -> str:
+        """Path of the best match for query (an image path or a text description)."""
+        return self.search_top(query)[0][0]
+
+    def search_top(self, query: str, top_k: int = 1) -> List[Tuple[str, float]]:
+        """Up to top_k (path, cosine similarity) matches for query, best first."""
         try:
             print(f"🔍 Searching for: {query}")
-            
-            # Check if query is a file path or text description
-            if os.path.exists(query):
-                # It's a file path - embed the image
-                print("📸 Embedding query image...")
-                query_vec = self.embedder.embed(query)[0]
-            else:
-                # It's a text description - embed the text using CLIP
-                print("📝 Embedding text description...")
-                query_vec = self.embedder.embed_text(query)[0]  # Get first (and only) vector
-            
-            print(f"✅ Query vector shape: {query_vec.shape}")
-
-            # Pull stored vectors
-            print("📊 Loading database vectors...")
-            df = self.table.to_pandas()
-            print(f"📋 Database has {len(df)} images")
-            
-            if df.empty:
-                raise ValueError("Image table is empty.")
-            
-            # Check if required columns exist
-            if 'Path' not in df.columns or 'Vector' not in df.columns:
-                raise ValueError(f"Missing required columns. Available: {df.columns.tolist()}")
-            
-            df = df[["Path", "Vector"]]
-            
-            # Convert vectors to numpy array
-            print("🔄 Converting vectors to numpy array...")
-            vectors = np.vstack(df["Vector"].values)
-            print(f"✅ Vectors shape: {vectors.shape}")
-            
-            # Calculate similarities
-            print("🧮 Calculating similarities...")
-            sims = cosine_similarity([query_vec], vectors)[0]
-            print(f"✅ Similarities calculated: {len(sims)} results")
-
-            # Get index of best match
-            best_idx = int(np.argmax(sims))
-            best_path = df.iloc[best_idx]["Path"]
-            best_score = sims[best_idx]
-            
+            matches = self.search_many([query], top_k)[0]
+            best_path, best_score = matches[0]
             print(f"🏆 Best match: {best_path} (score: {best_score:.4f})")
-            return best_path
-            
+            return matches
+
         except Exception as e:
             print(f"❌ Image search error: {e}")
             raise
 
+    def search_many(self, queries: List[str], top_k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Matches per query, in order. Uncached image paths and text descriptions are each
+        embedded in one pass, then searched in one multi-vector LanceDB query."""
+        # Check if each query is a file path or text description; repeat queries against an
+        # unchanged table skip the embedding and the vector search
+        version = self.table.version
+        parsed = [_query_key(query) for query in queries]
+        keys = [(self._cache_scope, version, query_key, top_k) for _, query_key in parsed]
+        matches = [image_results.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(matches) if cached is None]
+        if not missing:
+            return matches
+
+        # Check if required columns exist (from the schema, before reading any rows)
+        column_names = self.table.schema.names
+        if 'Path' not in column_names or 'Vector' not in column_names:
+            raise ValueError(f"Missing required columns. Available: {column_names}")
+
+        files = [i for i in missing if parsed[i][0]]
+        texts = [i for i in missing if not parsed[i][0]]
+        order = files + texts
+        vectors = []
+        if files:
+            # Query images, embedded with the same CLIP image tower as the index
+            print("📸 Embedding query images...")
+            vectors.append(self.embedder.embed_many([queries[i] for i in files]))
+        if texts:
+            # Text descriptions, embedded with CLIP's text tower
+            print("📝 Embedding text descriptions...")
+            vectors.append(self.embedder.embed_texts([queries[i] for i in texts]))
+
+        # Nearest neighbours by cosine distance, computed inside LanceDB (through the IVF_PQ index
+        # once the scraper has built one) instead of pulling every vector into numpy
+        print(f"🧮 Searching database vectors for {len(order)} queries...")
+        hits = (
+            self.table.search(np.concatenate(vectors).astype(np.float32, copy=False), vector_column_name="Vector")
+            .distance_type("cosine")
+            .select(["Path", "_distance"])
+            .limit(top_k)
+            .to_list()
+        )
+        if not hits:
+            raise ValueError("Image table is empty.")
+
+        for i in missing:
+            matches[i] = []
+        for hit in hits:
+            # A batch of one comes back without query_index; hits are sorted by distance per query
+            matches[order[hit.get("query_index", 0)]].append((hit["Path"], 1.0 - hit["_distance"]))
+        for i in missing:
+            image_results.put(keys[i], matches[i])
+        return matches
+
+
+def _query_key(query: str):
+    """
+    (is_file, cache key) for a query. A query image is identified by its stat as well, so
+    editing the file in place is not served a stale result.
+    """
+    try:
+        query_stat = os.stat(query)
+    except (OSError, ValueError):
+        return False, query
+    return True, (query, query_stat.st_mtime_ns, query_stat.st_size)
+
 
 if __name__ == "__main__":
-    searcher = ImageSearcher("C:/Users/sohan/Clarity/Clarity/apps/api/data/clarity_db")
+    # Same database and table the API routes use
+    db_path = os.getenv("DB_PATH", os.path.normpath(os.path.join(current_dir, "../../../data/index")))
+    searcher = ImageSearcher(db_path, f"{os.getenv('DB_TABLE', 'Hello')}_image")
     query_img = "C:/Users/sohan/Clarity/Clarity/apps/api/data/testdata/cat.png"
     print("Best match path:", searcher.search(query_img))
\ No newline at end of file
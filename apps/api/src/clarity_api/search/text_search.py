@@ -1,49 +1,78 @@
 import numpy as np
-import lancedb
-from sklearn.metrics.pairwise import cosine_similarity
 import sys
 import os
+from typing import List, Tuple
 
 # Add the project src directory to the path
 current_dir = os.path.dirname(__file__)
 project_src_dir = os.path.normpath(os.path.join(current_dir, "../../"))
 sys.path.insert(0, project_src_dir)
 
-from FileScraper import Summarizer
+from clarity_api.db import ensure_vector_index, get_db, get_table
+from clarity_api.search.query_cache import text_results
+from FileScraper import get_summarizer
 
 
 class TextSearcher:
     def __init__(self, db_path: str, table_name: str = "text"):
-        self.db = lancedb.connect(db_path)
+        # Connection and table handles are shared across requests (see clarity_api.db)
+        self.db = get_db(db_path)
         if table_name not in self.db.table_names():
             raise ValueError(f"Table '{table_name}' not found in LanceDB.")
-        self.table = self.db.open_table(table_name)
-        self.summarizer = Summarizer()
+        self.table = get_table(db_path, table_name)
+        self._cache_scope = (db_path, table_name)
+        # Searches go through the ANN index; legacy tables get one on first use
+        ensure_vector_index(db_path, table_name)
+        # Shared with indexing in this process, so models load once
+        self.summarizer = get_summarizer()
 
     def search(self, query: str) -> str:
-        # Embed query with Summarizer (prefer summarize_query, fallback to raw embed)
-        if hasattr(self.summarizer, "summarize_query"):
-            query_vec, _ = self.summarizer.summarize_query(query)
-        else:
-            query_vec = self.summarizer._embedder.encode(query)
-
-        # Pull stored vectors
-        df = self.table.to_pandas()
-        df = df[["Path", "Vector"]]
-        if df.empty:
-            raise ValueError("Text table is empty.")
+        """Path of the best match for query."""
+        return self.search_top(query)[0][0]
+
+    def search_top(self, query: str, top_k: int = 1) -> List[Tuple[str, float]]:
+        """Up to top_k (path, cosine similarity) matches for query, best first."""
+        return self.search_many([query], top_k)[0]
 
-        vectors = np.vstack(df["Vector"].values)
-        sims = cosine_similarity([query_vec], vectors)[0]
+    def search_many(self, queries: List[str], top_k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Matches per query, in order. Uncached queries are embedded in one batch and searched
+        in one multi-vector LanceDB query."""
+        # Repeat queries against an unchanged table skip the embedding and the vector search
+        version = self.table.version
+        keys = [(self._cache_scope, version, query, top_k) for query in queries]
+        matches = [text_results.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(matches) if cached is None]
+        if not missing:
+            return matches
 
-        # Get index of best match
-        best_idx = int(np.argmax(sims))
-        best_path = df.iloc[best_idx]["Path"]
+        # Unit-length like the indexed vectors, which the scraper embeds the same way
+        query_vecs = self.summarizer.embed_texts([queries[i] for i in missing])
+
+        # Nearest neighbours by cosine distance, computed inside LanceDB (through the IVF_PQ index
+        # once the scraper has built one); only Path and the distance come back, never the stored vectors
+        hits = (
+            self.table.search(np.asarray(query_vecs, dtype=np.float32), vector_column_name="Vector")
+            .distance_type("cosine")
+            .select(["Path", "_distance"])
+            .limit(top_k)
+            .to_list()
+        )
+        if not hits:
+            raise ValueError("Text table is empty.")
 
-        return best_path
+        for i in missing:
+            matches[i] = []
+        for hit in hits:
+            # A batch of one comes back without query_index; hits are sorted by distance per query
+            matches[missing[hit.get("query_index", 0)]].append((hit["Path"], 1.0 - hit["_distance"]))
+        for i in missing:
+            text_results.put(keys[i], matches[i])
+        return matches
 
 
 if __name__ == "__main__":
-    searcher = TextSearcher("C:/Users/sohan/Clarity/Clarity/apps/api/data/clarity_db")
+    # Same database and table the API routes use
+    db_path = os.getenv("DB_PATH", os.path.normpath(os.path.join(current_dir, "../../../data/index")))
+    searcher = TextSearcher(db_path, f"{os.getenv('DB_TABLE', 'Hello')}_text")
     query = "deep learning methods for image recognition"
     print("Best match path:", searcher.search(query))
\ No newline at end of file
@@ -1,23 +1,25 @@
 import lancedb
 import os
 
-# connect to your database (relative to project root)
-db_path = "C:\Coding\Clarity-1\apps\api\data"
-db = lancedb.connect(db_path)
+# Ad-hoc inspection script, kept out of import-time side effects
+if __name__ == "__main__":
+    # connect to your database (relative to project root)
+    db_path = "C:\Coding\Clarity-1\apps\api\data"
+    db = lancedb.connect(db_path)
 
-# check available tables
-print("Available tables:", db.table_names())
+    # check available tables
+    print("Available tables:", db.table_names())
 
-# try to open the table (adjust name based on what's available)
-if db.table_names():
-    table_name = db.table_names()[0]  # use first available table
-    table = db.open_table(table_name)
-    
-    # look at a few rows
-    print(f"\nTable '{table_name}' schema:")
-    print(table.schema)
-    
-    print(f"\nFirst 5 rows of '{table_name}':")
-    print(table.head(5))
-else:
-    print("No tables found in database")
+    # try to open the table (adjust name based on what's available)
+    if db.table_names():
+        table_name = db.table_names()[0]  # use first available table
+        table = db.open_table(table_name)
+
+        # look at a few rows
+        print(f"\nTable '{table_name}' schema:")
+        print(table.schema)
+
+        print(f"\nFirst 5 rows of '{table_name}':")
+        print(table.head(5))
+    else:
+        print("No tables found in database")
@@ -4,26 +4,41 @@
 import hashlib
 import json
 import os
+import re
 from collections import defaultdict
+from operator import itemgetter
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import lancedb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# orjson writes the (large) tree many times faster than json.dump; both write compact JSON with
+# identical bytes (create_node leaves no NaN, which orjson would write as null and json as NaN),
+# and the stdlib writer is the fallback when orjson isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import os
 from dotenv import load_dotenv, find_dotenv
 
 
+# Runs of path separators (and existing '|' delimiters) collapse to a single '|'
+_SEP_RE = re.compile(r"[\\/|]+")
+
+
 # ----------------------------- Utilities ----------------------------- #
 
 def md5_hexdigest(s: str) -> str:
     return hashlib.md5(s.encode("utf-8")).hexdigest()
 
 
-def human_is_folder_label(value: Optional[str]) -> bool:
-    if not isinstance(value, str):
-        return False
-    v = value.strip().lower()
-    return v in {"folder", "dir", "directory"}
+# Columns the tree builder reads from LanceDB
+TREE_COLUMNS = ("Path", "Parent", "Name", "File_type", "When_Created", "When_Last_Modified", "Size")
+
+FOLDER_LABELS = frozenset({"folder", "dir", "directory"})
 
 
 # ------------------------ File Tree Builder -------------------------- #
@@ -38,6 +53,8 @@ class FileTreeBuilder:
         self.table_name = table_name
         self.nodes: Dict[str, Dict[str, Any]] = {}
         self.adjacency_list: Dict[str, List[str]] = {}
+        # canonical path -> id; every directory is hashed once, not once per child naming it as parent
+        self._ids: Dict[str, str] = {}
 
     # -------- Path normalization (critical) -------- #
 
@@ -52,17 +69,15 @@ class FileTreeBuilder:
         if not s:
             return ""
 
-        # Replace both backslashes and forward slashes with |
-        normalized = s.replace("\\", "|").replace("/", "|")
-        
-        # Remove any double pipes that might occur
-        while "||" in normalized:
-            normalized = normalized.replace("||", "|")
-        
-        # Remove leading/trailing pipes
-        normalized = normalized.strip("|")
-        
-        return normalized
+        # Slashes of either kind become |, runs collapse, and leading/trailing pipes go
+        return _SEP_RE.sub("|", s).strip("|")
+
+    def normalize_column(self, raw: pa.ChunkedArray) -> pa.ChunkedArray:
+        """
+        Column-wise normalize_path: the same strip/collapse rules as Arrow compute kernels; missing -> "".
+        """
+        stripped = pc.utf8_trim_whitespace(pc.fill_null(raw, ""))
+        return pc.utf8_trim(pc.replace_substring_regex(stripped, _SEP_RE.pattern, "|"), "|")
 
     def normalized_parent(self, path_abs: str) -> str:
         """
@@ -71,21 +86,19 @@ class FileTreeBuilder:
         """
         if not path_abs:
             return ""
-        
-        # Split by | and remove the last part to get parent
-        parts = path_abs.split("|")
-        if len(parts) <= 1:
-            return ""  # No parent (this is root)
-        
-        # Join all parts except the last one
-        parent_parts = parts[:-1]
-        return "|".join(parent_parts)
+
+        # Everything before the last | (one scan and one slice, no split/join); no | means root
+        cut = path_abs.rfind("|")
+        return path_abs[:cut] if cut >= 0 else ""
 
     def generate_id(self, canonical_path_abs: str) -> str:
         """
         Stable ID derived from lowercased canonical path (case-insensitive like Windows).
         """
-        return md5_hexdigest(canonical_path_abs.lower())
+        node_id = self._ids.get(canonical_path_abs)
+        if node_id is None:
+            node_id = self._ids[canonical_path_abs] = md5_hexdigest(canonical_path_abs.lower())
+        return node_id
 
     # ---------------- LanceDB I/O ---------------- #
 
@@ -99,44 +112,48 @@ class FileTreeBuilder:
         
         print(f"   Opening table: {self.table_name}")
         table = db.open_table(self.table_name)
-        df = table.to_pandas()
-        print(f"   Loaded {len(df)} rows from table")
+        # Only the columns the tree uses are read; Vector/Description never leave LanceDB
+        columns = [col for col in TREE_COLUMNS if col in table.schema.names]
+        # Kept in Arrow until the string columns are prepared, then converted to pandas once
+        data = table.search().select(columns).to_arrow()
+        print(f"   Loaded {data.num_rows} rows from table")
 
         # Ensure expected columns exist; create empties if missing
-        print(f"   Original columns: {list(df.columns)}")
-        for col in ("Path", "Parent", "Name", "File_type", "When_Created", "When_Last_Modified"):
-            if col not in df.columns:
-                df[col] = None
+        print(f"   Original columns: {data.column_names}")
+        for col in TREE_COLUMNS:
+            if col not in data.column_names:
+                data = data.append_column(col, pa.nulls(data.num_rows))
                 print(f"   Added missing column: {col}")
 
         # Normalize columns (strings)
-        df["Path"] = df["Path"].astype(str)
-        df["Parent"] = df["Parent"].astype(str)
-        df["Name"] = df["Name"].astype(str)
-        
+        for col in ("Path", "Parent", "Name"):
+            data = data.set_column(data.schema.get_field_index(col), col, pc.cast(data[col], pa.string()))
+
+        # Canonicalize Path and Parent with Arrow kernels rather than pandas' per-element string ops
+        data = data.append_column("Path_norm", self.normalize_column(data["Path"]))
+        # If Parent empty, we'll derive from Path later per row
+        data = data.append_column("Parent_norm", self.normalize_column(data["Parent"]))
+
         print(f"   Data preprocessing complete")
-        return df
+        return data.to_pandas()
 
     # ---------------- Build logic ---------------- #
 
-    def is_directory_row(self, path_norm: str, file_type: Optional[str], parent_set: Set[str]) -> bool:
+    def directory_mask(self, path_norms: pd.Series, file_types: pd.Series, parent_set: Set[str]) -> pd.Series:
         """
-        Decide if a given path should be treated as a directory.
-        Priority:
+        Decide, for a whole column of paths at once, which should be treated as directories.
+        Any of:
           1) Explicit File_type label (folder/dir/directory)
           2) Path appears as a Parent somewhere
           3) Heuristic: no file extension → likely a directory
         """
-        if human_is_folder_label(file_type):
-            return True
-        if path_norm in parent_set:
-            return True
+        # Missing File_type values become <NA>, which isin treats as no match
+        folder_mask = file_types.astype("string").str.strip().str.lower().isin(FOLDER_LABELS)
+        in_parents_mask = path_norms.isin(parent_set)
         # Extension heuristic: if the last part has no extension, likely a directory
-        parts = path_norm.split("|")
-        if parts:
-            last_part = parts[-1]
-            return "." not in last_part
-        return False
+        last_parts = path_norms.str.rpartition("|")[2] if len(path_norms) else path_norms
+        no_ext_mask = ~last_parts.str.contains(".", regex=False)
+        return folder_mask | in_parents_mask | no_ext_mask
 
     def create_node(
         self,
@@ -158,19 +175,12 @@ class FileTreeBuilder:
         if name and name.strip():
             disp_name = name
         else:
-            # Get the last part of the path (after last |)
-            parts = path_abs.split("|")
-            disp_name = parts[-1] if parts else path_abs
+            # Get the last part of the path (after last |; the whole path if there is none)
+            disp_name = path_abs[path_abs.rfind("|") + 1:]
         
-        # Extract extension from display name
-        if is_dir:
-            ext = ""
-        else:
-            # Find the last dot in the name
-            if "." in disp_name:
-                ext = disp_name.split(".")[-1].lower()
-            else:
-                ext = ""
+        # Extract extension from display name: text after the last dot, if any
+        dot = -1 if is_dir else disp_name.rfind(".")
+        ext = disp_name[dot + 1:].lower() if dot >= 0 else ""
 
         node_id = self.generate_id(path_abs)
         parent_id = self.generate_id(parent_abs) if parent_abs else None
@@ -183,8 +193,9 @@ class FileTreeBuilder:
             "is_dir": 1 if is_dir else 0,
             "ext": ext,
             "size_bytes": size_bytes,
-            "when_created": float(when_created) if when_created else None,
-            "when_modified": float(when_modified) if when_modified else None,
+            # Missing timestamps arrive from pandas as NaN, which is truthy; both become null
+            "when_created": float(when_created) if when_created and pd.notna(when_created) else None,
+            "when_modified": float(when_modified) if when_modified and pd.notna(when_modified) else None,
             "is_synthetic": bool(is_synthetic),
         }
 
@@ -200,10 +211,14 @@ class FileTreeBuilder:
         df = self.load_table()
 
         print("Step 2: Normalizing paths...")
-        # Canonicalize Path and Parent
-        df["Path_norm"] = df["Path"].map(self.normalize_path)
-        # If Parent empty, we'll derive from Path later per row
-        df["Parent_norm"] = df["Parent"].map(self.normalize_path)
+        # Path_norm and Parent_norm were computed by load_table. Rows without a path are skipped
+        # and a path listed twice is built once, from its last row (the one that would win the
+        # upsert into self.nodes anyway), kept at its first row's position, which is where the
+        # upsert leaves the node in self.nodes
+        df = df[df["Path_norm"].ne("")]
+        last_rows = df.index.to_series().groupby(df["Path_norm"], sort=False).last()
+        if len(last_rows) < len(df):
+            df = df.loc[last_rows.to_numpy()]
 
         print(f"   Sample normalized paths:")
         for i, (orig, norm) in enumerate(zip(df["Path"].head(3), df["Path_norm"].head(3))):
@@ -217,12 +232,17 @@ class FileTreeBuilder:
 
         print("Step 3: Finding required directories...")
         # Also make sure every ancestor directory of every file is represented
+        # Walk each path's '|' prefixes from the deepest up; a prefix already seen means the
+        # rest of its chain was added by an earlier path
         required_dirs: Set[str] = set()
         for p in file_paths:
-            cur = self.normalized_parent(p)
-            while cur:
+            cut = p.rfind("|")
+            while cut > 0:
+                cur = p[:cut]
+                if cur in required_dirs:
+                    break
                 required_dirs.add(cur)
-                cur = self.normalized_parent(cur)
+                cut = p.rfind("|", 0, cut)
         required_dirs |= parent_set  # anything that was listed as a Parent must exist as a dir
         print(f"   Found {len(required_dirs)} required directories")
 
@@ -251,24 +271,26 @@ class FileTreeBuilder:
         # Add real rows (files and real dirs)
         files_processed = 0
         dirs_processed = 0
-        for row in df.itertuples(index=False):
-            path_norm: str = getattr(row, "Path_norm")
-            print(f"   Processing row: {path_norm}")
-            if not path_norm:
-                continue
-
-            # Prefer provided Parent; otherwise derive from Path
-            parent_norm_raw = getattr(row, "Parent_norm")
-            parent_norm = parent_norm_raw if parent_norm_raw else self.normalized_parent(path_norm)
-
-            name = getattr(row, "Name", None)
-            file_type = getattr(row, "File_type", None)
-            when_created = getattr(row, "When_Created", None)
-            when_modified = getattr(row, "When_Last_Modified", None)
-
-            # Decide if this row is a directory
-            is_dir = self.is_directory_row(path_norm, file_type, parent_set)
-
+        # Prefer provided Parent; otherwise derive from Path (everything before the last '|',
+        # as normalized_parent does), computed for the whole column at once
+        # (rpartition of an empty column has no columns to pick, hence the guard)
+        derived = df["Path_norm"].str.rpartition("|")[0] if len(df) else df["Path_norm"]
+        parent_norms = df["Parent_norm"].where(df["Parent_norm"] != "", derived)
+        # Directory or file, decided for every row before the loop
+        is_dirs = self.directory_mask(df["Path_norm"], df["File_type"], parent_set)
+        # Plain Python lists zipped together instead of a namedtuple and getattr calls per row;
+        # Size is recorded by the scraper, folders and tables indexed before the column have none
+        rows = zip(
+            df["Path_norm"].tolist(),
+            parent_norms.tolist(),
+            df["Name"].tolist(),
+            df["File_type"].tolist(),
+            df["When_Created"].tolist(),
+            df["When_Last_Modified"].tolist(),
+            df["Size"].tolist(),
+            is_dirs.tolist(),
+        )
+        for path_norm, parent_norm, name, file_type, when_created, when_modified, size, is_dir in rows:
             if is_dir:
                 dirs_processed += 1
             else:
@@ -286,35 +308,38 @@ class FileTreeBuilder:
                 when_created=when_created,
                 when_modified=when_modified,
                 is_synthetic=False,
+                size_bytes=int(size) if pd.notna(size) else None,
             )
             self.nodes[node["id"]] = node  # upsert
         
         print(f"   Processed {files_processed} files and {dirs_processed} directories from data")
 
-        print("Step 6: Building adjacency list...")
-        # Build adjacency with dedupe+sort (dirs first, then name A→Z)
-        by_parent: Dict[str, Set[str]] = defaultdict(set)
+        print("Step 6: Building adjacency list, roots and counts...")
+        # One pass over the nodes: children grouped by parent, roots (no parent_id or parent
+        # not present, e.g. drive roots) and the file/dir tallies for the metadata
+        # Children are kept with their sort key (dirs first, then name A→Z), computed while the
+        # node is at hand rather than looked up again by id during the sort
+        by_parent: Dict[str, List[Tuple[Tuple[int, str], str]]] = defaultdict(list)
+        root_ids: List[str] = []
+        total_dirs = 0
         for n in self.nodes.values():
             pid = n["parent_id"]
             if pid and pid in self.nodes:
-                by_parent[pid].add(n["id"])
+                by_parent[pid].append(((1 - n["is_dir"], n["name"].lower()), n["id"]))
+            else:
+                root_ids.append(n["id"])
+            total_dirs += n["is_dir"]
 
+        # Dedupe is implicit (node ids are dict keys); the sort is on the key only, so it stays
+        # stable for children with equal keys
         adj: Dict[str, List[str]] = {}
-        for pid, children_ids in by_parent.items():
-            ordered = list(children_ids)
-            ordered.sort(key=lambda nid: (1 - self.nodes[nid]["is_dir"], self.nodes[nid]["name"].lower()))
-            adj[p] = ordered if (p := pid) else ordered  # keep mypy calm
+        for pid, children in by_parent.items():
+            children.sort(key=itemgetter(0))
+            adj[pid] = [nid for _, nid in children]
 
         self.adjacency_list = adj
         print(f"   Built adjacency list with {len(adj)} parent nodes")
 
-        print("Step 7: Finding root nodes...")
-        # Root nodes: nodes with no parent_id or parent not present (drive roots)
-        root_ids = [
-            n["id"]
-            for n in self.nodes.values()
-            if (n["parent_id"] is None) or (n["parent_id"] not in self.nodes)
-        ]
         root_ids.sort(key=lambda nid: self.nodes[nid]["name"].lower())
         print(f"   Found {len(root_ids)} root nodes")
         
@@ -322,11 +347,10 @@ class FileTreeBuilder:
             root_node = self.nodes[root_id]
             print(f"     Root: {root_node['name']} ({root_node['path_abs']})")
 
-        print("Step 8: Generating metadata...")
         metadata = {
             "total_nodes": len(self.nodes),
-            "total_files": sum(1 for n in self.nodes.values() if n["is_dir"] == 0),
-            "total_directories": sum(1 for n in self.nodes.values() if n["is_dir"] == 1),
+            "total_files": len(self.nodes) - total_dirs,
+            "total_directories": total_dirs,
             "synthetic_directories": sum(1 for nid in synthetic_dir_ids if nid in self.nodes),
         }
         print(f"   Total nodes: {metadata['total_nodes']}")
@@ -356,8 +380,16 @@ class FileTreeBuilder:
         }
 
         print(f"   Writing JSON to: {out_path}")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
+        # Write then swap in, so /tree (which serves this file as-is) never sees a half-written tree.
+        # Compact: the file is only read by programs, and indentation adds about a third to its size
+        tmp_path = f"{out_path}.tmp"
+        if orjson is not None:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(payload))
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+        os.replace(tmp_path, out_path)
 
         # Avoid non-ASCII characters in console for Windows cp1252
         print(f"[OK] Tree saved -> {out_path}")
@@ -365,6 +397,18 @@ class FileTreeBuilder:
         return payload
 
 
+def resolve_output_path(output_path: str) -> str:
+    """A relative output_path is resolved against this file's directory, as when run as a script from here."""
+    return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), output_path))
+
+
+def build_tree(db_path: str, table_name: str, output_path: str) -> Dict[str, Any]:
+    """
+    Build the tree for one table and save it, for callers running in-process (the API routes).
+    """
+    return FileTreeBuilder(db_path, table_name).save_json(resolve_output_path(output_path))
+
+
 # ------------------------ Configuration ------------------------ #
 
 def main() -> None:
@@ -48,3 +48,11 @@ def test_tree_available_or_missing() -> None:
         assert "nodes" in data
         assert "root_ids" in data
 
+
+
+def test_rename_rejects_control_characters() -> None:
+    # Refused before the database or filesystem is touched
+    resp = client.post("/rename", json={"old_path": "C:|notes.txt", "new_name": "evil\nname.txt"})
+    assert resp.status_code == 400
+    resp = client.post("/rename", json={"old_path": "C:|notes\n.txt", "new_name": "notes2.txt"})
+    assert resp.status_code == 400
@@ -0,0 +1,43 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from clarity_api.routes.create import normalize_path  # type: ignore
+from tree_creation import FileTreeBuilder  # type: ignore
+
+
+def _reference_normalize(path: str) -> str:
+    # The original replace/while-loop implementation the regex version must match
+    if not path:
+        return ""
+    s = str(path).replace("\\", "|").replace("/", "|")
+    while "||" in s:
+        s = s.replace("||", "|")
+    return s.strip("|")
+
+
+CASES = [
+    "",
+    "C:\\a//b\\\\c",
+    "/home/user/docs/file.txt",
+    "C:\\Users\\me\\",
+    "a||b|/\\c",
+    "|||",
+    "no_separators",
+]
+
+
+def test_normalize_path_matches_reference() -> None:
+    for raw in CASES:
+        assert normalize_path(raw) == _reference_normalize(raw)
+
+
+def test_tree_builder_normalize_path_matches_reference() -> None:
+    builder = FileTreeBuilder(db_path="", table_name="")
+    for raw in CASES:
+        assert builder.normalize_path(raw) == _reference_normalize(raw.strip())
+    assert builder.normalize_path(None) == ""
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+import lancedb  # type: ignore
+import pyarrow as pa  # type: ignore
+from fastapi.testclient import TestClient  # type: ignore
+from clarity_api.app import app
+from clarity_api.search import text_search
+
+
+client = TestClient(app)
+
+
+class _FixedEmbedder:
+    def embed_texts(self, texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def _write_text_table(db_path: str, path: str, *others) -> None:
+    # path matches the fixed query vector exactly; each (path, vector) in others is added as is
+    rows = pa.table({
+        "Path": [path] + [other for other, _ in others],
+        "Vector": pa.array([[1.0, 1.0, 1.0, 1.0]] + [vector for _, vector in others], type=pa.list_(pa.float32(), 4)),
+    })
+    lancedb.connect(db_path).create_table("Cache_text", data=rows)
+
+
+def _search(db_path: str) -> str:
+    resp = client.post("/search-text", json={"query": "notes", "db_path": db_path, "table_name": "Cache_text"})
+    assert resp.status_code == 200
+    return resp.json()["results"][0]["path"]
+
+
+def test_search_after_clear_and_reindex_is_fresh(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(text_search, "get_summarizer", lambda: _FixedEmbedder())
+    db_path = str(tmp_path / "index")
+
+    _write_text_table(db_path, "C:\\old\\deleted.txt")
+    assert _search(db_path) == "C:\\old\\deleted.txt"
+
+    resp = client.post("/clear", json={"db_path": db_path, "output_path": str(tmp_path / "tree.json")})
+    assert resp.status_code == 200
+
+    # Recreated with the same steps, so the new table has the old one's version number
+    _write_text_table(db_path, "C:\\new\\kept.txt")
+    assert _search(db_path) == "C:\\new\\kept.txt"
+
+
+def test_search_scores_are_cosine_similarity(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(text_search, "get_summarizer", lambda: _FixedEmbedder())
+    db_path = str(tmp_path / "index")
+    _write_text_table(db_path, "C:\\same.txt", ("C:\\half.txt", [1.0, 0.0, 0.0, 0.0]))
+
+    resp = client.post("/search-text", json={
+        "query": "notes", "db_path": db_path, "table_name": "Cache_text", "top_k": 2,
+    })
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [result["path"] for result in results] == ["C:\\same.txt", "C:\\half.txt"]
+    assert abs(results[0]["score"] - 1.0) < 1e-5
+    assert abs(results[1]["score"] - 0.5) < 1e-5
@@ -36,6 +36,10 @@ a = Analysis(
         'clarity_api.routes.create',
         'clarity_api.routes.index',
         'clarity_api.routes.clear',
+        # Imported by the routes at call time
+        'tree_creation',
+        'FileScraper',
+        'clarity_api.db',
 
         # Indexing / embeddings
         'clarity_api.indexing.image_embed',
@@ -54,6 +58,7 @@ a = Analysis(
         'pdfplumber',
         'docx',
         'bs4',
+        'lxml.html',
     ],
     hookspath=[],
     hooksconfig={},